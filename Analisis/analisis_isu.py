@@ -1,216 +1,407 @@
+import time
+_MULAI_PROSES = time.perf_counter()
+
+import atexit
+import csv
+import hashlib
 import json
-import re
+import os
 import sys
 import logging
 import argparse
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# --- SETUP LOGGING ---
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("./Output/proses.log", encoding="utf-8"),    
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-
-# PARSE ARGUMEN
-parser = argparse.ArgumentParser(description="Analisis isu per daerah & tema")
-parser.add_argument("--daerah", type=str, help="Nama daerah spesifik yang mau dianalisis")
-parser.add_argument("--tema", type=str, help="Nama tema spesifik yang mau dianalisis")
-args = parser.parse_args()
-
-
-# LOAD DATA PEMDA
-try:
-    with open('./Data/data_pemda.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    logging.info("File data_pemda.json berhasil dimuat.")
-except FileNotFoundError:
-    logging.error("File data_pemda.json tidak ditemukan.")
-    sys.exit()
-
-
-# LOAD KAMUS TEMA
-try:
-    with open('./Data/kamus_tema.json', 'r', encoding='utf-8') as f:
-        kamus_raw = json.load(f)
-    logging.info("File kamus_tema.json berhasil dimuat.")
-except FileNotFoundError:
-    logging.error("File kamus_tema.json tidak ditemukan.")
-    sys.exit()
-
-# Ubah format jadi dict {id: {"nama":..., "keywords":...}}
-common_themes = {
-    tema["id"]: {
-        "nama": tema["nama"],
-        "keywords": tema["keywords"]
-    }
-    for tema in kamus_raw["klasifikasi_topik"]
-}
-
-# Mapping id -> nama
-themes_list = {
-    tema_id: tema_data["nama"]
-    for tema_id, tema_data in common_themes.items()
-}
-
-# Kalau user pilih tema, cek id temanya
-tema_filter_id = None
-if args.tema:
-    tema_filter_id = next((tid for tid, tnama in themes_list.items() if tnama.lower() == args.tema.lower()), None)
-    if tema_filter_id is None:
-        logging.error(f"Tema '{args.tema}' tidak ditemukan dalam kamus tema.")
+import numpy as np
+from cache_embedding import CACHE_DIR, encode_dengan_cache
+from encoder_isu import BACKENDS, TOKEN_BUDGET, cek_akurasi, muat_encoder_malas, nama_cache_backend, ukur_latensi
+from indeks_ann import N_PROBE, indeks_dengan_cache
+from kemiripan_blok import BLOCK_SIZE
+from korpus_isu import RELEVANCE_THRESHOLD, KorpusIsu, pemda_berubah, ringkas_hasil, saring_kandidat, sidik_per_pemda
+from penulis_hasil import PenulisJSONL, kompak_jsonl
+
+# sentence_transformers/torch gak di-import di sini: baru di-load kalau memang ada teks yg perlu di-encode
+_DURASI_IMPORT = time.perf_counter() - _MULAI_PROSES
+
+HASIL_PATH = './Output/hasil.json'
+HASIL_JSONL_PATH = './Output/hasil.jsonl'
+# Sidik per pemda + parameter run terakhir, buat --inkremental
+STATE_PATH = './Output/hasil.state.json'
+SWEEP_RINGKASAN_PATH = './Output/sweep_ringkasan.json'
+
+
+MATRIKS_PEMDA_PREFIX = './Output/matriks_pemda'
+
+
+def simpan_matriks_pemda(nama_region, jumlah, rata2, prefix=MATRIKS_PEMDA_PREFIX):
+    """Simpan matriks pemda x pemda ke .npy, .csv (dense, header = nama pemda), & .parquet kalau pyarrow ada"""
+    np.save(f"{prefix}_jumlah.npy", jumlah)
+    np.save(f"{prefix}_rata2.npy", rata2)
+    for nama_file, matriks, format_nilai in ((f"{prefix}_jumlah.csv", jumlah, "{:d}"), (f"{prefix}_rata2.csv", rata2, "{:.6f}")):
+        with open(nama_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["pemda"] + list(nama_region))
+            for nama, baris in zip(nama_region, matriks.tolist()):
+                writer.writerow([nama] + [format_nilai.format(v) for v in baris])
+
+    try:
+        import pandas as pd
+        # Format panjang (pemda_asal, pemda_pembanding) cuma untuk pasangan yg punya kecocokan
+        asal, pembanding = np.nonzero(jumlah)
+        pd.DataFrame({
+            "pemda_asal": np.asarray(nama_region, dtype=object)[asal],
+            "pemda_pembanding": np.asarray(nama_region, dtype=object)[pembanding],
+            "jumlah_isu_cocok": jumlah[asal, pembanding],
+            "rata2_skor_terbaik": rata2[asal, pembanding],
+        }).to_parquet(f"{prefix}.parquet", index=False)
+    except ImportError:
+        logging.info("ℹ️ pandas/pyarrow tidak tersedia, matriks pemda tidak disimpan ke parquet.")
+    logging.info(f"📂 Matriks pemda x pemda ({len(nama_region)} daerah) tersimpan di {prefix}_*.npy/.csv")
+
+
+def daftar_threshold(teks):
+    """Parse "0.4,0.5,0.6" jadi list float urut naik (buat --sweep)"""
+    try:
+        nilai = sorted({float(t) for t in teks.split(",") if t.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Daftar threshold '{teks}' tidak valid, contoh: 0.4,0.5,0.6")
+    if not nilai:
+        raise argparse.ArgumentTypeError("Daftar threshold kosong.")
+    return nilai
+
+
+def sidik_file(path):
+    """sha256 isi file (dibaca per chunk), buat memastikan hasil.json masih yg dicatat di state"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def muat_hasil_lama(parameter_run, sidik_baru):
+    """(hasil lama, set pemda berubah) kalau run sebelumnya bisa ditambal, selain itu (None, None)"""
+    if not (os.path.exists(STATE_PATH) and os.path.exists(HASIL_PATH)):
+        logging.info("ℹ️ Belum ada hasil/state run sebelumnya, analisis dijalankan penuh.")
+        return None, None
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        sidik_hasil = sidik_file(HASIL_PATH)
+        with open(HASIL_PATH, 'r', encoding='utf-8') as f:
+            hasil_lama = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"⚠️ Hasil/state lama tidak bisa dibaca, analisis dijalankan penuh: {e}")
+        return None, None
+
+    if state.get("parameter") != parameter_run:
+        logging.info("ℹ️ Parameter run berubah (model/threshold/tema/kamus), analisis dijalankan penuh.")
+        return None, None
+    # hasil.json bisa ditimpa run sebagian (--daerah) atau diedit; jangan tambal hasil yg bukan dari state ini
+    if state.get("sidik_hasil") != sidik_hasil:
+        logging.info(f"ℹ️ {HASIL_PATH} tidak cocok dengan state run penuh terakhir, analisis dijalankan penuh.")
+        return None, None
+    return hasil_lama, pemda_berubah(state.get("sidik_pemda", {}), sidik_baru)
+
+
+def jalankan_sweep(korpus, daerah_terpilih, tema_filter_id, args):
+    """Similaritas dihitung sekali di threshold terendah, tiap threshold lain cuma saring kandidat"""
+    indeks_ann = None
+    if args.ann:
+        indeks_ann = indeks_dengan_cache(korpus.embedding_norm, nama_cache_backend(args.encoder), args.ann_nlist, args.cache_dir)
+    kandidat_isu = korpus.hitung_kandidat(
+        daerah_terpilih, args.sweep[0], args.block_size, indeks_ann, args.ann_nprobe
+    )
+
+    ringkasan_sweep = {}
+    for threshold in args.sweep:
+        hasil_analisis = list(korpus.iter_hasil(daerah_terpilih, saring_kandidat(kandidat_isu, threshold), tema_filter_id))
+        ringkasan = ringkas_hasil(hasil_analisis)
+        ringkasan_sweep[f"{threshold:g}"] = ringkasan
+
+        path = f"./Output/hasil_t{threshold:g}.json"
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(hasil_analisis, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.error(f"Gagal menyimpan file {path}: {e}")
+        logging.info(
+            f"🎚️ Threshold {threshold:g}: {ringkasan['jumlah_isu']} isu, "
+            f"{ringkasan['jumlah_pasangan']} pasangan -> {path}"
+        )
+
+    try:
+        with open(SWEEP_RINGKASAN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(ringkasan_sweep, f, ensure_ascii=False, indent=2)
+        logging.info(f"📂 Ringkasan sweep tersimpan di {SWEEP_RINGKASAN_PATH}")
+    except Exception as e:
+        logging.error(f"Gagal menyimpan ringkasan sweep: {e}")
+
+
+def main():
+    # --- SETUP LOGGING ---
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("./Output/proses.log", encoding="utf-8"),    
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+
+    # PARSE ARGUMEN
+    parser = argparse.ArgumentParser(description="Analisis isu per daerah & tema")
+    parser.add_argument("--daerah", type=str, help="Nama daerah spesifik yang mau dianalisis")
+    parser.add_argument("--tema", type=str, help="Nama tema spesifik yang mau dianalisis")
+    parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="Folder cache embedding isu")
+    parser.add_argument("--tanpa-cache", action="store_true", help="Encode ulang semua isu tanpa pakai cache")
+    parser.add_argument("--batas-kata", action="store_true", help="Keyword tema harus cocok sebagai kata utuh, bukan substring")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="Jumlah isu per blok perhitungan similaritas")
+    parser.add_argument("--penyimpanan", choices=["float32", "float16", "int8"], default="float32", help="Bentuk embedding di RAM; float16/int8 di-skor ulang float32 untuk kandidat yg lolos")
+    parser.add_argument("--ann", action="store_true", help="Cari kandidat lewat index ANN (IVF-flat) + rerank exact, bukan perbandingan menyeluruh")
+    parser.add_argument("--ann-nlist", type=int, default=None, help="Jumlah list IVF (default: akar jumlah teks unik)")
+    parser.add_argument("--ann-nprobe", type=int, default=N_PROBE, help="Jumlah list IVF terdekat yang dicek per isu")
+    parser.add_argument("--encoder", choices=BACKENDS, default="fp32", help="Backend encoder: fp32 (baseline), onnx-int8, kecil (e5-small)")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah proses encoder paralel (model di-load sekali per worker)")
+    parser.add_argument("--jobs", type=int, default=1, help="Jumlah proses analisis per daerah paralel (embedding dibagi lewat memmap)")
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET, help="Maks token (termasuk padding) per batch encode; 0 = batch bawaan model.encode")
+    parser.add_argument("--sweep", type=daftar_threshold, help="Daftar threshold (mis. 0.4,0.5,0.6,0.7): similaritas dihitung sekali, hasil & ringkasan per threshold")
+    parser.add_argument("--matriks-pemda", action="store_true", help=f"Simpan juga matriks pemda x pemda (jumlah isu cocok & rata-rata skor terbaik) ke {MATRIKS_PEMDA_PREFIX}_*")
+    parser.add_argument("--inkremental", action="store_true", help="Cuma hitung ulang pemda yg isunya berubah sejak run terakhir, lalu tambal hasil.json lama")
+    parser.add_argument("--stream", action="store_true", help=f"Tulis hasil per record ke {HASIL_JSONL_PATH} sambil jalan (flush berkala)")
+    parser.add_argument("--kompak", action="store_true", help=f"Dengan --stream: setelah selesai, ringkas JSONL jadi {HASIL_PATH} (format array)")
+    parser.add_argument("--cek-akurasi", action="store_true", help="Bandingkan tetangga top-k backend --encoder dengan baseline fp32")
+    parser.add_argument("--k-akurasi", type=int, default=10, help="Jumlah tetangga (k) untuk --cek-akurasi")
+    args = parser.parse_args()
+
+
+    # LOAD DATA PEMDA
+    try:
+        with open('./Data/data_pemda.json', 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        logging.info("File data_pemda.json berhasil dimuat.")
+    except FileNotFoundError:
+        logging.error("File data_pemda.json tidak ditemukan.")
         sys.exit()
 
 
-# 3. FUNGSI UTILITAS
-def get_issue_themes(text):
-    """Deteksi tema apa aja yg muncul di text berdasarkan keywords"""
-    text_lower = text.lower()
-    matched_themes = set()
-    for tema_id, tema_data in common_themes.items():
-        if any(isinstance(kw, str) and kw in text_lower for kw in tema_data["keywords"]):
-            matched_themes.add(tema_id)
-    return matched_themes
-
-
-def explain_similarity(original_text_clean, matched_text_clean):
-    """Kasih penjelasan similarity berdasarkan keyword sama"""
-    original_text_lower = original_text_clean.lower()
-    matched_text_lower = matched_text_clean.lower()
-    found_themes_in_both = set()
-    
-    for tema_id, tema_data in common_themes.items():
-        keywords = tema_data["keywords"]
-        if any(kw in original_text_lower for kw in keywords) and any(kw in matched_text_lower for kw in keywords):
-            found_themes_in_both.add(tema_data["nama"])  
-    
-    if found_themes_in_both:
-        return "Fokus tema umum yang terdeteksi: " + ", ".join(sorted(found_themes_in_both)) + "."
-    else:
-        return "Kecocokan berdasarkan makna kalimat secara umum."
-
-# PERSIAPAN DATA ISU
-all_individual_issues = []
-for item in data['data']:
-    kodepemda = item['kodepemda']
-    pemda_name = item['namapemda']
-    for issue_text in item['data']:
-        if issue_text and issue_text.strip():
-            issue_clean_text = re.sub(r'^\d+\.\s*', '', issue_text).strip()
-            all_individual_issues.append({
-                "pemda_name": pemda_name,
-                "kodepemda": kodepemda,   
-                "issue_original_text": issue_text,
-                "issue_clean_text": issue_clean_text
-            })
-
-kota_acuan_pembanding = sorted(list(set(item['pemda_name'] for item in all_individual_issues)))
-
-logging.info(f"Total isu individu: {len(all_individual_issues)}")
-logging.info(f"Total daerah unik: {len(kota_acuan_pembanding)}")
-logging.info(f"Total tema: {len(themes_list)}")
-
-# LOAD MODEL SEMANTIK
-logging.info("📦 Memuat model semantik...")
-try:
-    model = SentenceTransformer('intfloat/multilingual-e5-large')
-    logging.info("✅ Model berhasil dimuat.")
-except Exception as e:
-    logging.critical(f"Gagal memuat model: {e}")
-    sys.exit()
-
-logging.info("🔄 Memproses embedding isu...")
-individual_issue_texts = [item['issue_clean_text'] for item in all_individual_issues]
-individual_issue_embeddings = model.encode(individual_issue_texts, convert_to_tensor=False, show_progress_bar=True)
-
-logging.info("📊 Menghitung matriks similaritas...")
-similarity_matrix_individual = cosine_similarity(individual_issue_embeddings)
-
-# PROSES ANALISIS
-relevance_threshold = 0.5
-hasil_analisis = []
-
-logging.info("🚀 Memulai analisis otomatis...")
-
-# Filter daerah
-daerah_terpilih = kota_acuan_pembanding
-if args.daerah:
-    if args.daerah not in kota_acuan_pembanding:
-        logging.error(f"Daerah '{args.daerah}' tidak ditemukan dalam data.")
+    # LOAD KAMUS TEMA
+    try:
+        with open('./Data/kamus_tema.json', 'r', encoding='utf-8') as f:
+            kamus_raw = json.load(f)
+        logging.info("File kamus_tema.json berhasil dimuat.")
+    except FileNotFoundError:
+        logging.error("File kamus_tema.json tidak ditemukan.")
         sys.exit()
-    daerah_terpilih = [args.daerah]
-
-for daerah_idx, daerah in enumerate(daerah_terpilih, start=1):
-    logging.info(f"[{daerah_idx}/{len(daerah_terpilih)}] 📍 Memproses daerah: {daerah}")
-
-    for tema_id, tema_nama in themes_list.items():
-        if tema_filter_id and tema_id != tema_filter_id:
-            continue  # skip kalau bukan tema yang diminta
 
-        isu_tersaring = [
-            (i, issue_data)
-            for i, issue_data in enumerate(all_individual_issues)
-            if issue_data['pemda_name'] == daerah and tema_id in get_issue_themes(issue_data['issue_clean_text'])
+    # PERSIAPAN DATA ISU & TEMA
+    korpus = KorpusIsu(data, kamus_raw, batas_kata=args.batas_kata)
+    all_individual_issues = korpus.all_individual_issues
+    kota_acuan_pembanding = korpus.kota_acuan_pembanding
+
+    # Kalau user pilih tema, cek id temanya
+    tema_filter_id = None
+    if args.tema:
+        tema_filter_id = korpus.cari_tema_id(args.tema)
+        if tema_filter_id is None:
+            logging.error(f"Tema '{args.tema}' tidak ditemukan dalam kamus tema.")
+            sys.exit()
+
+    # Filter daerah (dicek sebelum model di-load, biar salah ketik gak nunggu lama)
+    daerah_terpilih = kota_acuan_pembanding
+    if args.daerah:
+        if args.daerah not in kota_acuan_pembanding:
+            logging.error(f"Daerah '{args.daerah}' tidak ditemukan dalam data.")
+            sys.exit()
+        daerah_terpilih = [args.daerah]
+
+    logging.info(
+        f"⏱️ Startup: import {_DURASI_IMPORT * 1000:.0f} ms, argumen & data tervalidasi "
+        f"{(time.perf_counter() - _MULAI_PROSES) * 1000:.0f} ms sejak proses mulai."
+    )
+    logging.info(f"Total isu individu: {len(all_individual_issues)}")
+    logging.info(f"Total daerah unik: {len(kota_acuan_pembanding)}")
+    logging.info(f"Total tema: {len(korpus.themes_list)}")
+
+    # --sweep punya output sendiri (hasil_t<threshold>.json + ringkasan), opsi output lain gak berlaku
+    if args.sweep:
+        diabaikan = [
+            opsi for opsi, aktif in (("--stream", args.stream), ("--kompak", args.kompak), ("--matriks-pemda", args.matriks_pemda))
+            if aktif
         ]
-
-        if not isu_tersaring:
-            continue
-
-        logging.info(f"   - Tema '{tema_nama}': {len(isu_tersaring)} isu ditemukan")
-
-        for indeks_isu_terpilih, isu_terpilih_data in isu_tersaring:
-            best_match_per_region = {}
-            for j, isu_pembanding in enumerate(all_individual_issues):
-                if indeks_isu_terpilih == j or isu_pembanding['pemda_name'] == daerah:
-                    continue
-
-                skor = float(similarity_matrix_individual[indeks_isu_terpilih][j])
-                if skor < relevance_threshold:
-                    continue  # skip hasil jelek
-
-                nama_pemda_pembanding = isu_pembanding['pemda_name']
-                if nama_pemda_pembanding not in best_match_per_region or skor > best_match_per_region[nama_pemda_pembanding]['skor']:
-                    best_match_per_region[nama_pemda_pembanding] = {
-                        'pemda_pembanding': nama_pemda_pembanding,
-                        'isu_pembanding': isu_pembanding['issue_original_text'],
-                        'skor': skor,
-                        'analisis_tema': explain_similarity(
-                            isu_terpilih_data['issue_clean_text'],
-                            isu_pembanding['issue_clean_text']
-                        ),
-                        'kodepemda_pembanding': isu_pembanding['kodepemda']
-                    }
-
-            if best_match_per_region:
-                hasil_analisis.append({
-                    'daerah_asal': daerah,
-                    'kodepemda_asal': isu_terpilih_data['kodepemda'],   
-                    'tema_id': tema_id,
-                    'tema_nama': tema_nama,
-                    'isu_asal': isu_terpilih_data['issue_original_text'],
-                    'peringkat_kemiripan': sorted([
-                        {
-                            'pemda_pembanding': v['pemda_pembanding'],
-                            'kodepemda_pembanding': v['kodepemda_pembanding'],
-                            'isu_pembanding': v['isu_pembanding'],
-                            'skor': v['skor'],
-                            'analisis_tema': v['analisis_tema']
-                        }
-                        for v in best_match_per_region.values()
-                    ], key=lambda x: x['skor'], reverse=True)
-                })
-
-logging.info("✅ Analisis selesai, menyimpan hasil...")
-
-# SIMPAN HASIL
-try:
-    with open('./Output/hasil.json', 'w', encoding='utf-8') as f:
-        json.dump(hasil_analisis, f, ensure_ascii=False, indent=2)
-    logging.info("📂 Hasil analisis tersimpan di ./Output/hasil.json")
-except Exception as e:
-    logging.error(f"Gagal menyimpan file hasil.json: {e}")
+        if diabaikan:
+            logging.warning(f"⚠️ {'/'.join(diabaikan)} tidak dipakai dalam mode --sweep.")
+
+    # CEK RUN INKREMENTAL
+    sidik_baru = sidik_per_pemda(data)
+    parameter_run = {
+        "model": nama_cache_backend(args.encoder),
+        "threshold": RELEVANCE_THRESHOLD,
+        "tema": tema_filter_id,
+        "batas_kata": args.batas_kata,
+        "ann": args.ann,
+        "kamus": hashlib.sha256(json.dumps(kamus_raw, sort_keys=True).encode("utf-8")).hexdigest()
+    }
+    hasil_lama, daerah_berubah = None, None
+    if args.inkremental:
+        if args.matriks_pemda:
+            logging.warning("⚠️ --matriks-pemda butuh kandidat semua isu, --inkremental tidak dipakai.")
+        elif args.sweep:
+            logging.warning("⚠️ --inkremental tidak dipakai dalam mode --sweep.")
+        elif args.daerah or args.ann:
+            logging.warning("⚠️ --inkremental tidak bisa digabung dengan --daerah/--ann, analisis dijalankan penuh.")
+        else:
+            hasil_lama, daerah_berubah = muat_hasil_lama(parameter_run, sidik_baru)
+            if hasil_lama is not None and not daerah_berubah:
+                logging.info(f"✅ Tidak ada pemda yang berubah, {HASIL_PATH} sudah terbaru.")
+                return
+
+    # MODEL SEMANTIK (lazy: baru di-load kalau ada teks yg belum ada di cache)
+    encode_isu, nama_cache = muat_encoder_malas(args.encoder, token_budget=args.token_budget, workers=args.workers)
+
+    logging.info("🔄 Memproses embedding isu...")
+    individual_issue_texts = [item['issue_clean_text'] for item in all_individual_issues]
+    teks_unik = korpus.teks_unik
+
+    try:
+        if args.tanpa_cache:
+            embedding_unik = encode_isu(teks_unik)
+        else:
+            embedding_unik = encode_dengan_cache(teks_unik, nama_cache, encode_isu, args.cache_dir)
+    except Exception as e:
+        logging.critical(f"Gagal memuat model / meng-encode isu: {e}")
+        sys.exit()
+    # --jobs cuma untuk analisis menyeluruh biasa (bukan ANN / tambalan inkremental)
+    paralel = (
+        args.jobs > 1 and not args.ann and hasil_lama is None and not args.daerah
+        and not args.sweep and not args.matriks_pemda
+    )
+    if args.jobs > 1 and not paralel:
+        logging.warning("⚠️ --jobs tidak dipakai bareng --ann/--inkremental/--daerah/--sweep/--matriks-pemda, analisis dijalankan serial.")
+    byte_per_embedding = embedding_unik.shape[1] * 4 if len(teks_unik) else 0
+    korpus.pasang_embedding(embedding_unik, args.penyimpanan, args.cache_dir, pakai_mmap=paralel)
+    # Yg dipakai seterusnya cuma korpus.embedding_norm (memmap/ringkas), salinan float32 mentah dilepas
+    del embedding_unik
+    # File memmap sementara dihapus di akhir run, termasuk kalau keluar lewat return/sys.exit
+    atexit.register(korpus.lepas_embedding)
+
+    jumlah_duplikat = len(individual_issue_texts) - len(teks_unik)
+    logging.info(
+        f"♻️ Dedup isu: {len(teks_unik)} teks unik dari {len(individual_issue_texts)} isu, "
+        f"hemat {jumlah_duplikat} panggilan encoder & {jumlah_duplikat * byte_per_embedding / 1024:.1f} KB embedding."
+    )
+
+    # CEK AKURASI BACKEND vs BASELINE FP32
+    if args.cek_akurasi:
+        if args.encoder == "fp32":
+            logging.warning("⚠️ --cek-akurasi cuma berguna kalau --encoder bukan fp32, dilewati.")
+        else:
+            logging.info("🔍 Membandingkan tetangga top-k dengan baseline fp32...")
+            encode_acuan, nama_cache_acuan = muat_encoder_malas("fp32", show_progress_bar=False)
+            embedding_acuan = encode_dengan_cache(teks_unik, nama_cache_acuan, encode_acuan, args.cache_dir)
+            # Embedding backend uji dibaca ulang dari cache (semua hit, model gak dipanggil), kalau tanpa cache
+            # pakai embedding korpus yg sudah ter-normalisasi
+            embedding_uji = (
+                korpus.embedding_norm if args.tanpa_cache
+                else encode_dengan_cache(teks_unik, nama_cache, encode_isu, args.cache_dir)
+            )
+            hasil_cek = cek_akurasi(embedding_acuan, embedding_uji, k=args.k_akurasi)
+            del embedding_uji
+
+            sampel_latensi = teks_unik[:64]
+            latensi_acuan = ukur_latensi(encode_acuan, sampel_latensi)
+            latensi_uji = ukur_latensi(encode_isu, sampel_latensi)
+            logging.info(
+                f"   - Recall@{hasil_cek['k']} ({hasil_cek['n_sampel']} isu sampel): {hasil_cek['recall_at_k']:.3f}, "
+                f"selisih skor rata-rata: {hasil_cek['selisih_skor_rata2']:.4f}"
+            )
+            logging.info(
+                f"   - Latensi per isu: fp32 {latensi_acuan * 1000:.1f} ms vs {args.encoder} {latensi_uji * 1000:.1f} ms"
+            )
+
+    # PROSES ANALISIS
+    relevance_threshold = RELEVANCE_THRESHOLD
+
+    # Similaritas dihitung per blok baris, yg disimpan cuma kandidat di atas threshold (bukan matriks N x N)
+    logging.info(f"📊 Menghitung kandidat similaritas (blok {args.block_size} isu)...")
+    if args.sweep:
+        jalankan_sweep(korpus, daerah_terpilih, tema_filter_id, args)
+        return
+
+    if hasil_lama is not None:
+        # Cuma baris & kolom pemda berubah: O(berubah x N), bukan O(N^2)
+        logging.info(f"🔁 Mode inkremental: {len(daerah_berubah)} pemda berubah: {', '.join(sorted(daerah_berubah))}")
+        kandidat_berubah = korpus.hitung_kandidat_berubah(daerah_berubah, relevance_threshold, args.block_size)
+
+        logging.info("🚀 Menambal hasil analisis lama...")
+        iter_record = korpus.iter_hasil_patch(hasil_lama, daerah_berubah, kandidat_berubah, tema_filter_id)
+    elif paralel:
+        from paralel_daerah import iter_hasil_paralel
+        logging.info(f"🚀 Memulai analisis otomatis dengan {args.jobs} proses...")
+        iter_record = iter_hasil_paralel(
+            korpus, data, kamus_raw, daerah_terpilih, args.jobs, tema_filter_id,
+            relevance_threshold, args.block_size, args.batas_kata
+        )
+    else:
+        indeks_ann = None
+        if args.ann:
+            indeks_ann = indeks_dengan_cache(korpus.embedding_norm, nama_cache, args.ann_nlist, args.cache_dir)
+        kandidat_isu = korpus.hitung_kandidat(
+            daerah_terpilih, relevance_threshold, args.block_size, indeks_ann, args.ann_nprobe
+        )
+
+        if args.matriks_pemda:
+            # Langsung dari kandidat per isu, bukan dari hasil.json
+            jumlah, rata2 = korpus.matriks_daerah(kandidat_isu)
+            try:
+                simpan_matriks_pemda(korpus.nama_region, jumlah, rata2)
+            except OSError as e:
+                logging.error(f"Gagal menyimpan matriks pemda: {e}")
+
+        logging.info("🚀 Memulai analisis otomatis...")
+        iter_record = korpus.iter_hasil(daerah_terpilih, kandidat_isu, tema_filter_id)
+
+    # SIMPAN HASIL
+    if args.stream:
+        # Record langsung ditulis begitu jadi, gak ditampung di list
+        try:
+            with PenulisJSONL(HASIL_JSONL_PATH) as penulis:
+                for record in iter_record:
+                    penulis.tulis(record)
+            logging.info(f"✅ Analisis selesai, {penulis.jumlah} record tersimpan di {HASIL_JSONL_PATH}")
+            if args.kompak:
+                kompak_jsonl(HASIL_JSONL_PATH, HASIL_PATH)
+                logging.info(f"📂 Hasil analisis diringkas ke {HASIL_PATH}")
+        except Exception as e:
+            logging.error(f"Gagal menyimpan hasil stream: {e}")
+            return
+    else:
+        hasil_analisis = list(iter_record)
+        logging.info("✅ Analisis selesai, menyimpan hasil...")
+        try:
+            with open(HASIL_PATH, 'w', encoding='utf-8') as f:
+                json.dump(hasil_analisis, f, ensure_ascii=False, indent=2)
+            logging.info(f"📂 Hasil analisis tersimpan di {HASIL_PATH}")
+        except Exception as e:
+            logging.error(f"Gagal menyimpan file hasil.json: {e}")
+            return
+
+    # State cuma berlaku untuk hasil semua daerah yg ada di hasil.json (acuan --inkremental),
+    # plus sidik hasil.json-nya biar hasil yg ditimpa/diedit belakangan gak ikut ditambal
+    if not args.stream or args.kompak:
+        try:
+            if args.daerah:
+                # hasil.json sekarang cuma satu daerah, state run penuh sebelumnya gak berlaku lagi
+                if os.path.exists(STATE_PATH):
+                    os.remove(STATE_PATH)
+            else:
+                with open(STATE_PATH, 'w', encoding='utf-8') as f:
+                    json.dump(
+                        {"parameter": parameter_run, "sidik_pemda": sidik_baru, "sidik_hasil": sidik_file(HASIL_PATH)},
+                        f, ensure_ascii=False
+                    )
+        except OSError as e:
+            logging.warning(f"⚠️ Gagal menyimpan state run: {e}")
+
+
+if __name__ == "__main__":
+    # Wajib di-guard: worker --workers (spawn) meng-import ulang modul utama
+    main()
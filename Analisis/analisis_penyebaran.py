@@ -1,8 +1,13 @@
 import json
+import numpy as np
 import pandas as pd
 import sys
 import os
 import logging
+import argparse
+from data_pemda import iter_pemda
+from matriks_tema import matriks_tema_dengan_cache
+from pencocok_keyword import PencocokKeyword
 
 # --- SETUP LOGGING ---
 os.makedirs('./Output', exist_ok=True)
@@ -15,6 +20,14 @@ logging.basicConfig(
     ]
 )
 
+# PARSE ARGUMEN
+parser = argparse.ArgumentParser(description="Analisis penyebaran satu tema ke seluruh pemda")
+parser.add_argument(
+    "--stream", action="store_true",
+    help="Baca data_pemda.json per record pemda & hitung skor on the fly (memori konstan, tanpa cache matriks tema)"
+)
+args = parser.parse_args()
+
 # LOAD KAMUS TEMA
 kamus_path = './Data/kamus_tema.json'
 
@@ -40,9 +53,15 @@ THEMES = {item["nama"]: item["keywords"] for item in kamus_data["klasifikasi_top
 data_path = './Data/data_pemda.json'
 
 try:
-    with open(data_path, 'r', encoding='utf-8') as f:
-        raw_data = json.load(f)
-    logging.info(f"✅ File {data_path} berhasil dimuat.")
+    if args.stream:
+        # Mode stream: file baru dibaca setelah tema dipilih, di sini cuma dicek ada
+        if not os.path.isfile(data_path):
+            raise FileNotFoundError(data_path)
+        logging.info(f"✅ File {data_path} ditemukan (mode stream).")
+    else:
+        with open(data_path, 'r', encoding='utf-8') as f:
+            raw_data = json.load(f)
+        logging.info(f"✅ File {data_path} berhasil dimuat.")
 except FileNotFoundError:
     logging.error(f"❌ File {data_path} tidak ditemukan.")
     sys.exit()
@@ -63,23 +82,46 @@ except (ValueError, IndexError):
     logging.error("❌ Pilihan tidak valid.")
     sys.exit()
 
-keywords_to_search = THEMES[tema_utama]
-
-# PROSES ANALISIS PENYEBARAN
-hasil_analisis = []
-for item in raw_data['data']:
-    nama_pemda = item['namapemda']
-    list_program = item['data']
-
-    jumlah_isu_tema = sum(
-        1 for program in list_program
-        if any(keyword.lower() in program.lower() for keyword in keywords_to_search)
+tema_idx = list(THEMES.keys()).index(tema_utama)
+
+if args.stream:
+    # PROSES ANALISIS PENYEBARAN (stream): skor tiap pemda dihitung begitu record-nya selesai di-parse
+    pencocok = PencocokKeyword(list(THEMES.values()))
+    hasil_analisis = []
+    try:
+        for item in iter_pemda(data_path):
+            hasil_analisis.append({
+                'Nama_Pemda': item['namapemda'],
+                'Skor_Tema': sum(1 for program in item['data'] if tema_idx in pencocok.tema_cocok(program))
+            })
+    except json.JSONDecodeError:
+        logging.error(f"❌ File {data_path} bukan JSON yang valid.")
+        sys.exit()
+    logging.info(f"✅ {len(hasil_analisis)} record pemda selesai di-stream dari {data_path}.")
+else:
+    # MATRIKS ISU x TEMA (dihitung sekali, di-cache untuk run berikutnya)
+    semua_program = []
+    indeks_pemda_program = []
+    for pemda_idx, item in enumerate(raw_data['data']):
+        for program in item['data']:
+            semua_program.append(program)
+            indeks_pemda_program.append(pemda_idx)
+
+    matriks_tema = matriks_tema_dengan_cache(semua_program, list(THEMES.values()))
+    mask_tema = matriks_tema.mask_tema(tema_idx)
+
+    # PROSES ANALISIS PENYEBARAN
+    jumlah_isu_tema_per_pemda = np.bincount(
+        np.asarray(indeks_pemda_program, dtype=np.int64)[mask_tema],
+        minlength=len(raw_data['data'])
     )
 
-    hasil_analisis.append({
-        'Nama_Pemda': nama_pemda,
-        'Skor_Tema': jumlah_isu_tema
-    })
+    hasil_analisis = []
+    for pemda_idx, item in enumerate(raw_data['data']):
+        hasil_analisis.append({
+            'Nama_Pemda': item['namapemda'],
+            'Skor_Tema': int(jumlah_isu_tema_per_pemda[pemda_idx])
+        })
 
 df_hasil_sorted = pd.DataFrame(hasil_analisis).sort_values(by='Skor_Tema', ascending=False)
 
@@ -1,5 +1,6 @@
 import json
 import re
+import argparse
 from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -18,6 +19,24 @@ logging.basicConfig(
     ]
 )
 
+# PARSE ARGUMEN
+parser = argparse.ArgumentParser(description="Analisis topik utama per pemda (TF-IDF)")
+parser.add_argument(
+    "--mode", choices=["pasangan", "global"], default="pasangan",
+    help="pasangan: fit TF-IDF per isu x tema (cara lama); global: satu fit TF-IDF untuk semua isu & tema"
+)
+parser.add_argument(
+    "--ambang", type=float, default=None,
+    help="Skor minimal isu dianggap cocok dgn tema (default: 0.25 mode pasangan, 0.35 mode global)"
+)
+args = parser.parse_args()
+
+# Ambang default per mode: 0.25 di-tuning untuk IDF 2 dokumen (isu + tema) di mode pasangan.
+# IDF seluruh korpus di mode global bikin skor lebih tinggi, di 0.25 hasilnya kebanyakan cocok
+# (data contoh: 11 vs 8 pemda, 18 vs 14 isu); 0.35 paling dekat ke mode pasangan.
+AMBANG_DEFAULT = {"pasangan": 0.25, "global": 0.35}
+ambang = args.ambang if args.ambang is not None else AMBANG_DEFAULT[args.mode]
+
 # LOAD KAMUS TEMA ===
 kamus_path = "Data/kamus_tema.json"
 try:
@@ -85,6 +104,64 @@ def analyze_single_region_issues_tfidf(pemda_data, threshold=0.25):
 
     return theme_counts, unmatched_issues, matched_issues_by_theme, theme_scores
 
+# ANALISIS SEMUA PEMDA (MODE GLOBAL)
+def analyze_all_regions_issues_tfidf_global(data, threshold=0.25):
+    """
+    Satu fit TF-IDF untuk semua representasi tema + semua isu, lalu semua isu diskor
+    ke semua tema sekaligus lewat satu perkalian matriks sparse + argmax.
+    Hasil: list per pemda dengan format sama kayak analyze_single_region_issues_tfidf.
+    """
+    theme_names = list(THEMES.keys())
+    theme_texts = [" ".join(keywords) for keywords in THEMES.values()]
+
+    # Kumpulkan isu yg valid dari semua pemda (pemda_idx, isu asli, isu bersih)
+    semua_isu = []
+    for pemda_idx, pemda_data in enumerate(data):
+        issues = pemda_data.get('data', [])
+        if not issues or not issues[0]:
+            continue
+        for issue in issues:
+            cleaned_issue = clean_issue(issue)
+            if cleaned_issue:
+                semua_isu.append((pemda_idx, issue, cleaned_issue))
+
+    best_theme_idx, best_scores = [], []
+    if semua_isu:
+        vectorizer = TfidfVectorizer()
+        vectorizer.fit(theme_texts + [cleaned for _, _, cleaned in semua_isu])
+        theme_matrix = vectorizer.transform(theme_texts)
+        issue_matrix = vectorizer.transform([cleaned for _, _, cleaned in semua_isu])
+
+        # Vektor TF-IDF sudah ter-normalisasi L2, jadi dot product = cosine similarity
+        score_matrix = (issue_matrix @ theme_matrix.T).toarray()
+        best_theme_idx = score_matrix.argmax(axis=1)
+        best_scores = score_matrix.max(axis=1)
+
+    hasil = [(None, None, None, None)] * len(data)
+    for pemda_idx, pemda_data in enumerate(data):
+        issues = pemda_data.get('data', [])
+        if issues and issues[0]:
+            hasil[pemda_idx] = (
+                Counter(),
+                [],
+                {theme: [] for theme in THEMES},
+                {theme: [] for theme in THEMES}
+            )
+
+    for (pemda_idx, issue, _), theme_idx, best_score in zip(semua_isu, best_theme_idx, best_scores):
+        theme_counts, unmatched_issues, matched_issues_by_theme, theme_scores = hasil[pemda_idx]
+
+        # Threshold supaya gak asal cocok
+        if best_score >= threshold and best_score > 0:
+            best_theme = theme_names[theme_idx]
+            theme_counts[best_theme] += 1
+            theme_scores[best_theme].append(round(float(best_score) * 100, 2))
+            matched_issues_by_theme[best_theme].append(issue.strip())
+        else:
+            unmatched_issues.append(issue.strip())
+
+    return hasil
+
 # LOAD DATA PEMDA 
 data_path = "Data/data_pemda.json"
 try:
@@ -100,8 +177,15 @@ except json.JSONDecodeError:
 
 hasil_akhir = []
 
-for pemda in data:
-    theme_counts, unmatched, matched, scores = analyze_single_region_issues_tfidf(pemda)
+if args.mode == "global":
+    logging.info(f"⚙️ Mode global: satu fit TF-IDF untuk semua isu & tema (ambang {ambang}).")
+    hasil_global = analyze_all_regions_issues_tfidf_global(data, ambang)
+
+for pemda_idx, pemda in enumerate(data):
+    if args.mode == "global":
+        theme_counts, unmatched, matched, scores = hasil_global[pemda_idx]
+    else:
+        theme_counts, unmatched, matched, scores = analyze_single_region_issues_tfidf(pemda, ambang)
     if not theme_counts:
         continue
 
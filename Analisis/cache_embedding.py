@@ -0,0 +1,276 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+
+import numpy as np
+
+# Folder default cache embedding (relatif ke root repo, sama kayak ./Data & ./Output)
+CACHE_DIR = "./Output/cache_embedding"
+
+# Jumlah shard maksimal per model sebelum semua digabung jadi satu (biar gak kebanyakan file kecil)
+MAKS_SHARD = 16
+
+# Umur (detik) file lock yg dianggap sisa proses yg mati
+LOCK_BASI = 600
+
+
+def kunci_teks(model_name, text):
+    """Hash sha256 dari nama model + teks isu yg sudah dibersihkan"""
+    return hashlib.sha256(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _path_cache(cache_dir, model_name):
+    """Path index .json & file lock untuk satu model, plus slug-nya (prefix nama shard .npy)"""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return (
+        os.path.join(cache_dir, f"{slug}.index.json"),
+        os.path.join(cache_dir, f"{slug}.lock"),
+        slug,
+    )
+
+
+@contextlib.contextmanager
+def _kunci_file(path):
+    """
+    Lock antar proses sederhana (tanpa dependensi): file lock dibuat eksklusif (O_EXCL) & dihapus waktu selesai.
+    Lock yg lebih tua dari LOCK_BASI detik dianggap sisa proses yg mati lalu diambil alih.
+    """
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_BASI:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue  # lock barusan dilepas, coba lagi
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _baca_index(index_path, model_name, slug):
+    """Isi index (dict dgn 'kunci' & 'shard' [{file, n}]) atau None kalau gak ada / rusak / beda model"""
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index_raw = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"⚠️ Index cache embedding tidak bisa dibaca, dibuat ulang: {e}")
+        return None
+    if index_raw.get("model") != model_name:
+        return None
+    if "shard" not in index_raw:
+        # Format lama: satu matriks {slug}.npy yg ditulis ulang tiap ada teks baru
+        index_raw["shard"] = [{"file": f"{slug}.npy", "n": len(index_raw.get("kunci", []))}]
+    return index_raw
+
+
+def _buka_shard(cache_dir, index_raw):
+    """Memmap tiap shard, dicek jumlah baris & dimensinya sama dengan yg dicatat index (kalau beda -> ValueError)"""
+    shards = []
+    for shard in index_raw["shard"]:
+        matriks = np.load(os.path.join(cache_dir, shard["file"]), mmap_mode="r")
+        if matriks.ndim != 2 or matriks.shape[0] != shard["n"] or (shards and matriks.shape[1] != shards[0].shape[1]):
+            raise ValueError(f"shard {shard['file']} tidak cocok dengan index")
+        shards.append(matriks)
+    if sum(len(m) for m in shards) != len(index_raw["kunci"]):
+        raise ValueError("jumlah kunci index tidak cocok dengan total baris shard")
+    return shards
+
+
+def muat_cache(model_name, cache_dir=CACHE_DIR):
+    """
+    Load index {kunci: baris} & list shard embedding (memory-mapped, baris global = urutan shard).
+    Kalau gak ada / rusak / index gak cocok dgn shard-nya -> kosong.
+    """
+    index_path, _, slug = _path_cache(cache_dir, model_name)
+    for _ in range(3):
+        index_raw = _baca_index(index_path, model_name, slug)
+        if index_raw is None:
+            return {}, []
+        try:
+            shards = _buka_shard(cache_dir, index_raw)
+        except FileNotFoundError:
+            continue  # shard barusan digabung proses lain, baca ulang index-nya
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Cache embedding tidak cocok dengan index-nya, dibuat ulang: {e}")
+            return {}, []
+        return {kunci: baris for baris, kunci in enumerate(index_raw["kunci"])}, shards
+    return {}, []
+
+
+def ambil_baris(shards, baris):
+    """Baris global dari list shard jadi satu array float32 (sesuai urutan baris)"""
+    baris = np.asarray(baris, dtype=np.int64)
+    batas = np.cumsum([0] + [len(m) for m in shards])
+    hasil = np.empty((len(baris), shards[0].shape[1] if shards else 0), dtype=np.float32)
+    asal = np.searchsorted(batas, baris, side="right") - 1
+    for s in np.unique(asal):
+        pilih = asal == s
+        hasil[pilih] = shards[s][baris[pilih] - batas[s]]
+    return hasil
+
+
+def _tulis_shard(path, matriks_list, n_baris):
+    """Tulis beberapa potongan matriks berurutan jadi satu .npy (lewat open_memmap, gak digabung dulu di RAM)"""
+    tmp_path = path + ".tmp.npy"
+    keluar = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_baris, matriks_list[0].shape[1]))
+    posisi = 0
+    for potong in matriks_list:
+        keluar[posisi:posisi + len(potong)] = potong
+        posisi += len(potong)
+    keluar.flush()
+    del keluar
+    os.replace(tmp_path, path)
+
+
+def tambah_cache(model_name, kunci_list, embedding, cache_dir=CACHE_DIR, maks_entri=None):
+    """
+    Tambah embedding baru ke cache sebagai shard baru (data lama gak ditulis ulang).
+    Semua di bawah lock: index dibaca ulang (bisa saja sudah ditambah proses lain), kunci yg sudah ada dilewati,
+    shard baru ditulis dgn nama unik lalu index diganti atomik, jadi index gak pernah menunjuk matriks yg salah.
+    Kalau shard lebih dari MAKS_SHARD, atau entri lebih dari maks_entri (entri paling lama dibuang duluan, FIFO),
+    semua shard digabung jadi satu.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path, lock_path, slug = _path_cache(cache_dir, model_name)
+
+    with _kunci_file(lock_path):
+        index_raw = _baca_index(index_path, model_name, slug)
+        try:
+            shards = _buka_shard(cache_dir, index_raw) if index_raw is not None else []
+        except (OSError, ValueError):
+            index_raw, shards = None, []  # sudah diperingatkan muat_cache, dibuat ulang dari yg baru
+        if index_raw is None:
+            index_raw = {"model": model_name, "dim": int(embedding.shape[1]), "kunci": [], "shard": []}
+
+        sudah_ada = set(index_raw["kunci"])
+        pilih = [b for b, kunci in enumerate(kunci_list) if kunci not in sudah_ada]
+        if pilih:
+            nama_shard = f"{slug}.shard-{uuid.uuid4().hex}.npy"
+            _tulis_shard(os.path.join(cache_dir, nama_shard), [embedding[pilih]], len(pilih))
+            index_raw["kunci"] += [kunci_list[b] for b in pilih]
+            index_raw["shard"].append({"file": nama_shard, "n": len(pilih)})
+            shards.append(np.load(os.path.join(cache_dir, nama_shard), mmap_mode="r"))
+
+        buang = max(0, len(index_raw["kunci"]) - maks_entri) if maks_entri is not None else 0
+        if buang or len(index_raw["shard"]) > MAKS_SHARD:
+            # Gabung semua shard (minus entri terlama yg dibuang) jadi satu
+            potong, sisa_buang = [], buang
+            for matriks in shards:
+                if sisa_buang < len(matriks):
+                    potong.append(matriks[sisa_buang:])
+                sisa_buang = max(0, sisa_buang - len(matriks))
+            index_raw["kunci"] = index_raw["kunci"][buang:]
+            nama_shard = f"{slug}.shard-{uuid.uuid4().hex}.npy"
+            if index_raw["kunci"]:
+                _tulis_shard(os.path.join(cache_dir, nama_shard), potong, len(index_raw["kunci"]))
+                index_raw["shard"] = [{"file": nama_shard, "n": len(index_raw["kunci"])}]
+            else:
+                index_raw["shard"] = []
+            del potong
+
+        if not pilih and not buang:
+            return
+        del shards
+
+        tmp_index = index_path + ".tmp"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump(index_raw, f)
+        os.replace(tmp_index, index_path)
+        _hapus_shard_yatim(cache_dir, slug, {shard["file"] for shard in index_raw["shard"]})
+
+
+def _hapus_shard_yatim(cache_dir, slug, dipakai):
+    """Hapus shard model ini yg gak dipakai index lagi (sisa penggabungan / proses yg mati sebelum ganti index)"""
+    pola = re.compile(rf"^{re.escape(slug)}(\.shard-[0-9a-f]{{32}})?\.npy$")
+    for nama in os.listdir(cache_dir):
+        if pola.match(nama) and nama not in dipakai:
+            try:
+                os.remove(os.path.join(cache_dir, nama))
+            except OSError:
+                pass  # masih di-memmap (Windows), dihapus di penggabungan berikutnya
+
+
+def simpan_mmap(matriks, path):
+    """Tulis matriks float32 ke .npy lalu buka lagi sebagai memmap read-only (gak makan RAM heap)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(matriks, dtype=np.float32))
+        os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+def dedup_teks(texts):
+    """
+    Ambil teks unik (urutan kemunculan pertama) + array indeks balik,
+    jadi teks_unik[inverse[i]] == texts[i].
+    """
+    posisi = {}
+    inverse = np.empty(len(texts), dtype=np.int64)
+    for i, teks in enumerate(texts):
+        inverse[i] = posisi.setdefault(teks, len(posisi))
+    return list(posisi), inverse
+
+
+def encode_dengan_cache(texts, model_name, encode_fn, cache_dir=CACHE_DIR, maks_entri=None):
+    """
+    Ambil embedding tiap teks dari cache, cuma teks baru/berubah yg di-encode.
+    encode_fn(list_teks) -> array (n, dim). Hasil: array float32 (len(texts), dim) sesuai urutan input.
+    Teks baru ditambahkan sebagai shard baru (lihat tambah_cache), bukan menulis ulang seluruh matriks.
+    maks_entri: batas jumlah baris cache (mis. cache query), entri paling lama dibuang duluan (FIFO)
+    biar file cache gak tumbuh terus.
+    """
+    keys = [kunci_teks(model_name, t) for t in texts]
+    index, shards = muat_cache(model_name, cache_dir)
+
+    # Kunci yg belum ada di cache (unik, urutan tetap) -> posisinya di embedding_baru
+    kunci_baru = {}
+    for kunci, teks in zip(keys, texts):
+        if kunci not in index and kunci not in kunci_baru:
+            kunci_baru[kunci] = teks
+
+    logging.info(
+        f"💾 Cache embedding: {len(texts) - sum(1 for k in keys if k in kunci_baru)} teks dari cache, "
+        f"{len(kunci_baru)} teks perlu di-encode."
+    )
+
+    embedding_baru = None
+    if kunci_baru:
+        embedding_baru = np.asarray(encode_fn(list(kunci_baru.values())), dtype=np.float32)
+        try:
+            tambah_cache(model_name, list(kunci_baru), embedding_baru, cache_dir, maks_entri)
+        except OSError as e:
+            logging.warning(f"⚠️ Gagal menyimpan cache embedding: {e}")
+
+    if not keys:
+        dim = embedding_baru.shape[1] if embedding_baru is not None else (shards[0].shape[1] if shards else 0)
+        return np.zeros((0, dim), dtype=np.float32)
+
+    # Teks baru diambil langsung dari hasil encode, sisanya dari shard yg sudah di-memmap di awal
+    if embedding_baru is None:
+        return ambil_baris(shards, [index[k] for k in keys])
+    posisi_baru = {kunci: b for b, kunci in enumerate(kunci_baru)}
+    hasil = np.empty((len(keys), embedding_baru.shape[1]), dtype=np.float32)
+    dari_baru = np.fromiter((k in posisi_baru for k in keys), dtype=bool, count=len(keys))
+    hasil[dari_baru] = embedding_baru[[posisi_baru[k] for k in keys if k in posisi_baru]]
+    if not dari_baru.all():
+        hasil[~dari_baru] = ambil_baris(shards, [index[k] for k in keys if k not in posisi_baru])
+    return hasil
@@ -0,0 +1,88 @@
+import time
+_MULAI_PROSES = time.perf_counter()
+
+import json
+import sys
+import logging
+import argparse
+from cache_embedding import CACHE_DIR, encode_dengan_cache
+from encoder_isu import BACKENDS, PREFIX_QUERY, muat_encoder_malas
+from korpus_isu import KorpusIsu, bersihkan_isu
+
+# Jumlah query terakhir yg disimpan di cache query (FIFO), biar cache-nya gak tumbuh tiap ada query baru
+MAKS_CACHE_QUERY = 256
+
+# --- SETUP LOGGING ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("./Output/proses.log", encoding="utf-8"),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+# PARSE ARGUMEN
+parser = argparse.ArgumentParser(description="Cari pemda yang punya isu mirip dengan teks bebas")
+parser.add_argument("teks", type=str, help="Teks query, mis. \"penanganan banjir rob\"")
+parser.add_argument("--k", type=int, default=20, help="Jumlah isu teratas yang diambil (sebelum dikelompokkan per pemda)")
+parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="Folder cache embedding isu")
+parser.add_argument("--batas-kata", action="store_true", help="Keyword tema harus cocok sebagai kata utuh, bukan substring")
+parser.add_argument("--encoder", choices=BACKENDS, default="fp32", help="Backend encoder (harus sama dengan yg dipakai analisis_isu.py biar cache kepakai)")
+parser.add_argument("--output", type=str, help="Simpan hasil ke file JSON ini")
+args = parser.parse_args()
+
+teks_query = bersihkan_isu(args.teks)
+if not teks_query:
+    logging.error("Teks query kosong.")
+    sys.exit()
+
+
+# LOAD DATA PEMDA & KAMUS TEMA
+try:
+    with open('./Data/data_pemda.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with open('./Data/kamus_tema.json', 'r', encoding='utf-8') as f:
+        kamus_raw = json.load(f)
+except FileNotFoundError as e:
+    logging.error(f"File data tidak ditemukan: {e.filename}")
+    sys.exit()
+
+korpus = KorpusIsu(data, kamus_raw, batas_kata=args.batas_kata)
+
+# EMBEDDING: isu korpus & query sama-sama lewat cache, model cuma di-load kalau ada yg belum ter-cache
+encode_isu, nama_cache = muat_encoder_malas(args.encoder, show_progress_bar=False, token_budget=0)
+try:
+    korpus.pasang_embedding(encode_dengan_cache(korpus.teks_unik, nama_cache, encode_isu, args.cache_dir))
+    mulai_cari = time.perf_counter()
+    # Cache query dipisah dari cache isu, biar query baru gak menulis ulang matriks cache isu yg besar
+    embedding_query = encode_dengan_cache(
+        [PREFIX_QUERY + teks_query], f"{nama_cache}#query", encode_isu, args.cache_dir, maks_entri=MAKS_CACHE_QUERY
+    )[0]
+except Exception as e:
+    logging.critical(f"Gagal memuat model / meng-encode isu: {e}")
+    sys.exit()
+
+hasil = korpus.cari_per_pemda(embedding_query, args.k)
+durasi_cari = time.perf_counter() - mulai_cari
+
+tema_query = sorted(korpus.themes_list[korpus.tema_ids[t]] for t in korpus.pencocok_tema.tema_cocok(teks_query))
+logging.info(f"🔎 Query: \"{teks_query}\" (tema terdeteksi: {', '.join(tema_query) or '-'})")
+for peringkat, kelompok in enumerate(hasil, start=1):
+    logging.info(f"{peringkat}. {kelompok['pemda']} ({kelompok['kodepemda']}) - skor terbaik {kelompok['skor_terbaik']:.3f}")
+    for isu in kelompok["isu"]:
+        logging.info(f"     - [{isu['skor']:.3f}] {isu['isu']} | tema: {', '.join(isu['tema']) or '-'}")
+
+logging.info(
+    f"⏱️ {len(hasil)} pemda dari top-{args.k} isu; cari {durasi_cari * 1000:.1f} ms, "
+    f"total {(time.perf_counter() - _MULAI_PROSES) * 1000:.0f} ms sejak proses mulai."
+)
+
+if args.output:
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"query": teks_query, "tema_query": tema_query, "hasil": hasil}, f, ensure_ascii=False, indent=2)
+        logging.info(f"📂 Hasil pencarian tersimpan di {args.output}")
+    except Exception as e:
+        logging.error(f"Gagal menyimpan file {args.output}: {e}")
@@ -0,0 +1,169 @@
+import json
+from pathlib import Path
+
+try:
+    import ijson  # opsional, parser streaming berbasis C kalau terinstall
+except ImportError:
+    ijson = None
+
+# Path default data pemda (relatif ke root repo)
+DATA_PATH = Path("Data/data_pemda.json")
+
+# Ukuran chunk baca (karakter) untuk parser streaming bawaan
+UKURAN_CHUNK = 1 << 20
+_SPASI = " \t\n\r"
+_PEMISAH = _SPASI + ",:]}"
+
+
+def muat_data_pemda(path=DATA_PATH):
+    """Load data_pemda.json, hasil: list record pemda (bagian "data" kalau ada)"""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return raw.get("data", raw)
+
+
+class _PembacaJSON:
+    """Tokenizer JSON minimal di atas buffer teks yg diisi bertahap dari file (bagian yg sudah dibaca dibuang)"""
+
+    def __init__(self, f, chunk_size=UKURAN_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.habis = False
+        self._decoder = json.JSONDecoder()
+
+    def _isi(self):
+        """Tambah satu chunk ke buffer, False kalau file sudah habis"""
+        if self.habis:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.habis = not chunk
+        return not self.habis
+
+    def intip(self):
+        """Karakter non-spasi berikutnya tanpa dikonsumsi, "" kalau file habis"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _SPASI:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._isi():
+                return ""
+
+    def ambil(self, karakter):
+        if self.intip() != karakter:
+            raise json.JSONDecodeError(f"Diharapkan {karakter!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def nilai(self):
+        """Decode satu nilai JSON utuh dari posisi sekarang, buffer diisi ulang sampai nilainya lengkap"""
+        self.intip()
+        while True:
+            try:
+                obj, akhir = self._decoder.raw_decode(self.buf, self.pos)
+                # Angka di ujung buffer bisa kepotong ("12" dari "123", "1" dari "1e5"), jadi harus diikuti pemisah
+                if self.habis or (akhir < len(self.buf) and self.buf[akhir] in _PEMISAH):
+                    self.pos = akhir
+                    return obj
+            except json.JSONDecodeError:
+                if self.habis:
+                    raise
+            self._isi()
+
+
+def _iter_array_data(baca):
+    """Yield elemen array "data" (atau array top-level) satu per satu; key lain di objek top-level dilewati"""
+    if baca.intip() == "{":
+        baca.ambil("{")
+        while baca.intip() != "}":
+            kunci = baca.nilai()
+            baca.ambil(":")
+            if kunci == "data" and baca.intip() == "[":
+                break
+            baca.nilai()
+            if baca.intip() == ",":
+                baca.ambil(",")
+        else:
+            return  # gak ada array "data"
+    baca.ambil("[")
+    if baca.intip() == "]":
+        return
+    while True:
+        yield baca.nilai()
+        if baca.intip() == "]":
+            return
+        baca.ambil(",")
+
+
+def _byte_pertama(f):
+    """Byte non-spasi pertama file biner (posisi file dikembalikan ke awal)"""
+    while True:
+        b = f.read(1)
+        if not b or not b.isspace():
+            f.seek(0)
+            return b
+
+
+def iter_pemda(path=DATA_PATH, chunk_size=UKURAN_CHUNK):
+    """
+    Versi streaming muat_data_pemda: yield record pemda satu per satu tanpa load seluruh file,
+    jadi memori sebanding satu record, bukan ukuran file. Pakai ijson kalau terinstall,
+    kalau gak pakai tokenizer bawaan (json.JSONDecoder.raw_decode per record).
+    Error parsing (termasuk dari ijson) di-raise sebagai json.JSONDecodeError saat iterasi.
+    """
+    if ijson is not None:
+        with open(path, "rb") as f:
+            prefix = "item" if _byte_pertama(f) == b"[" else "data.item"
+            try:
+                yield from ijson.items(f, prefix, use_float=True)
+            except ijson.JSONError as e:
+                raise json.JSONDecodeError(str(e), "", 0) from e
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _iter_array_data(_PembacaJSON(f, chunk_size))
+
+
+def normalisasi_isu(isu):
+    """Daftar isu jadi list string lowercase (format string, dict {"kategori": ...}, atau satu string)"""
+    hasil = []
+    if isinstance(isu, list):
+        for i in isu:
+            if isinstance(i, dict):  # kalau format dict
+                val = str(i.get("kategori", "")).strip().lower()
+                if val:
+                    hasil.append(val)
+            elif isinstance(i, str):  # kalau format string
+                hasil.append(i.strip().lower())
+    elif isinstance(isu, str):
+        hasil.append(isu.strip().lower())
+    return hasil
+
+
+def baris_pemda(item):
+    """Satu baris tabel bersama: kode, nama, isu mentah (buat tabel) & isu ternormalisasi (buat distribusi)"""
+    isu = item.get("data", [])
+    return {
+        "kodepemda": item.get("kodepemda"),
+        "namapemda": item.get("namapemda"),
+        "isu_mentah": isu,
+        "isu_normal": normalisasi_isu(isu),
+    }
+
+
+def tabel_pemda(data):
+    """Normalisasi semua record pemda sekali, dipakai bareng oleh semua laporan"""
+    return [baris_pemda(item) for item in data]
+
+
+def semua_isu(tabel):
+    """Semua isu ternormalisasi dari tabel, urut sesuai data"""
+    return [isu for baris in tabel for isu in baris["isu_normal"]]
+
+
+def iter_isu(data):
+    """Versi lazy semua_isu langsung dari record pemda (mis. dari iter_pemda), gak menyimpan tabel"""
+    for item in data:
+        yield from normalisasi_isu(item.get("data", []))
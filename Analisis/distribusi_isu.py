@@ -1,3 +1,4 @@
+import argparse
 import json
 import pandas as pd
 from pathlib import Path
@@ -9,87 +10,52 @@ from collections import Counter
 import matplotlib.pyplot as plt
 import base64
 from io import BytesIO
-
-# --- SETUP LOGGING ---
-os.makedirs("Output", exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("Output/proses.log", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from data_pemda import iter_isu, iter_pemda, muat_data_pemda
 
 # Path file input/output
 input_path = Path(r"D:\testing magang\Analisis_isu_PythonFile-main\Data\data_pemda.json")
 output_path = Path("Output/distribusi_isu.html")
 
-# Load JSON
-try:
-    with open(input_path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    logging.info(f"✅ File {input_path} berhasil dimuat.")
-except FileNotFoundError:
-    logging.error(f"❌ File {input_path} tidak ditemukan.")
-    sys.exit()
-except json.JSONDecodeError:
-    logging.error(f"❌ File {input_path} bukan JSON yang valid.")
-    sys.exit()
-
-# Ambil bagian data aja
-data = raw.get("data", raw)
-
-# Kumpulkan semua isu ke satu list dengan normalisasi
-all_issues = []
-for item in data:
-    isu = item.get("data", [])
-    if isinstance(isu, list):
-        for i in isu:
-            if isinstance(i, dict):  # kalau format dict
-                val = str(i.get("kategori", "")).strip().lower()
-                if val:
-                    all_issues.append(val)
-            elif isinstance(i, str):  # kalau format string
-                all_issues.append(i.strip().lower())
-    elif isinstance(isu, str):
-        all_issues.append(isu.strip().lower())
-
-logging.info(f"📊 Total isu terkumpul: {len(all_issues)}")
 
-# Hitung distribusi isu
-counter = Counter(all_issues)
-logging.info(f"📈 Jumlah kategori isu ditemukan: {len(counter)}")
+def buat_distribusi_isu(all_issues, output_path=output_path):
+    """
+    Distribusi isu (teks ternormalisasi) + grafik top 10 ke HTML, hasil: Counter isu.
+    all_issues boleh list atau iterable lazy (data_pemda.iter_isu), dihitung sekali jalan ke Counter.
+    """
+    # Hitung distribusi isu
+    counter = Counter(all_issues)
+    logging.info(f"📊 Total isu terkumpul: {sum(counter.values())}")
+    logging.info(f"📈 Jumlah kategori isu ditemukan: {len(counter)}")
 
-# Buat DataFrame untuk distribusi
-df = pd.DataFrame(counter.items(), columns=["Isu", "Jumlah"]).sort_values(by="Jumlah", ascending=False)
+    # Buat DataFrame untuk distribusi
+    df = pd.DataFrame(counter.items(), columns=["Isu", "Jumlah"]).sort_values(by="Jumlah", ascending=False)
 
-# Logging 10 besar isu
-logging.info("🏆 10 Isu Teratas:")
-for isu, jumlah in counter.most_common(10):
-    logging.info(f"   - {isu}: {jumlah}")
+    # Logging 10 besar isu
+    logging.info("🏆 10 Isu Teratas:")
+    for isu, jumlah in counter.most_common(10):
+        logging.info(f"   - {isu}: {jumlah}")
 
-# --- Buat grafik batang ---
-plt.figure(figsize=(10, 6))
-df.head(10).plot(kind="bar", x="Isu", y="Jumlah", legend=False, color="skyblue")
-plt.title("Top 10 Distribusi Isu Strategis")
-plt.xlabel("Isu")
-plt.ylabel("Jumlah")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
+    # --- Buat grafik batang ---
+    plt.figure(figsize=(10, 6))
+    df.head(10).plot(kind="bar", x="Isu", y="Jumlah", legend=False, color="skyblue")
+    plt.title("Top 10 Distribusi Isu Strategis")
+    plt.xlabel("Isu")
+    plt.ylabel("Jumlah")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
 
-# Simpan grafik ke memory buffer
-buf = BytesIO()
-plt.savefig(buf, format="png", bbox_inches="tight")
-plt.close()
-buf.seek(0)
-img_base64 = base64.b64encode(buf.read()).decode("utf-8")
+    # Simpan grafik ke memory buffer
+    buf = BytesIO()
+    plt.savefig(buf, format="png", bbox_inches="tight")
+    plt.close("all")
+    buf.seek(0)
+    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
 
-# Generate tabel HTML
-table_html = df.to_html(index=False, escape=False)
+    # Generate tabel HTML
+    table_html = df.to_html(index=False, escape=False)
 
-# Bungkus dengan template HTML + grafik
-html = f"""<!doctype html>
+    # Bungkus dengan template HTML + grafik
+    html = f"""<!doctype html>
 <html lang="id">
 <head>
 <meta charset="utf-8">
@@ -156,12 +122,46 @@ html = f"""<!doctype html>
 </body>
 </html>"""
 
-# Simpan ke file
-try:
+    # Simpan ke file
     output_path.write_text(html, encoding="utf-8")
     logging.info(f"📂 Tabel + grafik distribusi isu berhasil diekspor ke: {output_path}")
-except Exception as e:
-    logging.error(f"❌ Gagal menyimpan file HTML: {e}")
-    sys.exit()
+    return counter
+
+
+if __name__ == "__main__":
+    # PARSE ARGUMEN
+    parser = argparse.ArgumentParser(description="Distribusi isu strategis (tabel + grafik HTML)")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Baca data_pemda.json per record pemda & hitung isu on the fly (memori konstan)"
+    )
+    args = parser.parse_args()
+
+    # --- SETUP LOGGING ---
+    os.makedirs("Output", exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("Output/proses.log", encoding="utf-8"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    try:
+        if args.stream:
+            # Stream JSON: isu dinormalisasi & dihitung per record pemda, tanpa load seluruh file / list semua isu
+            buat_distribusi_isu(iter_isu(iter_pemda(input_path)))
+        else:
+            buat_distribusi_isu(iter_isu(muat_data_pemda(input_path)))
+    except FileNotFoundError:
+        logging.error(f"❌ File {input_path} tidak ditemukan.")
+        sys.exit()
+    except json.JSONDecodeError:
+        logging.error(f"❌ File {input_path} bukan JSON yang valid.")
+        sys.exit()
+    except Exception as e:
+        logging.error(f"❌ Gagal menyimpan file HTML: {e}")
+        sys.exit()
 
-logging.info("🎉 Proses analisis distribusi isu selesai.")
+    logging.info("🎉 Proses analisis distribusi isu selesai.")
@@ -1,66 +1,20 @@
-import json
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
+import argparse
+import json
 import logging
+import shutil
 import sys
 import os
+import tempfile
+from data_pemda import DATA_PATH, baris_pemda, iter_pemda, muat_data_pemda, tabel_pemda
 
-# --- SETUP LOGGING ---
-os.makedirs("Output", exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("Output/proses.log", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-# Path file input/output
-input_path = Path("Data/data_pemda.json")
-output_path = Path("Output/tabel_pemda.html")
-
-# Load JSON
-try:
-    with open(input_path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    logging.info(f"✅ File {input_path} berhasil dimuat.")
-except FileNotFoundError:
-    logging.error(f"❌ File {input_path} tidak ditemukan.")
-    sys.exit()
-except json.JSONDecodeError:
-    logging.error(f"❌ File {input_path} bukan JSON yang valid.")
-    sys.exit()
-
-# Ambil bagian data aja
-data = raw.get("data", raw)
-
-rows = []
-for item in data:
-    kodepemda = item.get("kodepemda")
-    namapemda = item.get("namapemda")
-    isu = item.get("data", [])
-
-    if isinstance(isu, list):
-        isu_gabung = "<br>".join(isu)
-    else:
-        isu_gabung = str(isu)
-
-    rows.append({
-        "Kode Pemda": kodepemda,
-        "Nama Pemda": namapemda,
-        "Isu Strategis": isu_gabung
-    })
-
-df = pd.DataFrame(rows)
-logging.info(f"📊 Data berhasil diproses. Jumlah baris: {len(df)}")
-
-# Generate tabel HTML
-table_html = df.to_html(index=False, escape=False)
-
-# Bungkus dengan template HTML + styling
-html = f"""<!doctype html>
+# Path file output
+OUTPUT_PATH = Path("Output/tabel_pemda.html")
+KOLOM = ["Kode Pemda", "Nama Pemda", "Isu Strategis"]
+
+# Template HTML + styling ({isi_tabel} diisi baris <tr> hasil streaming)
+HTML_TEMPLATE = """<!doctype html>
 <html lang="id">
 <head>
 <meta charset="utf-8">
@@ -107,17 +61,102 @@ html = f"""<!doctype html>
 </head>
 <body>
   <h1>Isu Strategis per Pemda</h1>
-  <div class="sub">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} • Rows: {len(df)}</div>
-  {table_html}
+  <div class="sub">Generated: {generated} • Rows: {n_baris}</div>
+  <table border="1" class="dataframe">
+  <thead>
+    <tr style="text-align: right;">
+{kepala_tabel}    </tr>
+  </thead>
+  <tbody>
+{{isi_tabel}}  </tbody>
+</table>
 </body>
 </html>"""
 
-# Simpan ke file
-try:
-    output_path.write_text(html, encoding="utf-8")
+
+
+def _sel(nilai):
+    # Per nilai, bukan per kolom: None tampil NaN, sisanya str() apa adanya
+    return "NaN" if nilai is None else str(nilai)
+
+
+def buat_tabel_pemda(tabel, output_path=OUTPUT_PATH):
+    """
+    Tabel HTML isu strategis per pemda, hasil: jumlah baris.
+    tabel: iterable baris (data_pemda.tabel_pemda atau map(baris_pemda, iter_pemda(...))), dibaca sekali jalan:
+    baris <tr> langsung ditulis ke file sementara, jadi memori gak ikut naik dengan jumlah pemda.
+    Struktur markup-nya sama dengan df.to_html(index=False, escape=False), dan untuk kolom teks
+    (kodepemda/namapemda string seperti di data_pemda.json) hasilnya identik. Beda untuk kolom angka:
+    pandas memformat per kolom (mis. kode int + ada yg kosong jadi float "1101.0"), di sini per nilai ("1101").
+    """
+    n_baris = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as isi_tabel:
+        for baris in tabel:
+            isu = baris["isu_mentah"]
+
+            if isinstance(isu, list):
+                isu_gabung = "<br>".join(isu)
+            else:
+                isu_gabung = str(isu)
+
+            isi_tabel.write("    <tr>\n")
+            for nilai in (baris["kodepemda"], baris["namapemda"], isu_gabung):
+                isi_tabel.write(f"      <td>{_sel(nilai)}</td>\n")
+            isi_tabel.write("    </tr>\n")
+            n_baris += 1
+
+        logging.info(f"📊 Data berhasil diproses. Jumlah baris: {n_baris}")
+
+        # Jumlah baris baru ketahuan di akhir, jadi kepala HTML ditulis setelah semua baris terkumpul
+        kepala_tabel = "".join(f"      <th>{k}</th>\n" for k in KOLOM)
+        kepala, ekor = HTML_TEMPLATE.format(
+            generated=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), n_baris=n_baris, kepala_tabel=kepala_tabel
+        ).split("{isi_tabel}")
+
+        # Simpan ke file
+        isi_tabel.seek(0)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(kepala)
+            shutil.copyfileobj(isi_tabel, f)
+            f.write(ekor)
     logging.info(f"📂 Tabel HTML berhasil diekspor ke: {output_path}")
-except Exception as e:
-    logging.error(f"❌ Gagal menyimpan file HTML: {e}")
-    sys.exit()
+    return n_baris
+
+
+if __name__ == "__main__":
+    # PARSE ARGUMEN
+    parser = argparse.ArgumentParser(description="Tabel HTML isu strategis per pemda")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Baca data_pemda.json per record pemda, langsung ditulis jadi baris tabel (memori konstan)"
+    )
+    args = parser.parse_args()
+
+    # --- SETUP LOGGING ---
+    os.makedirs("Output", exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("Output/proses.log", encoding="utf-8"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    try:
+        if args.stream:
+            # Stream JSON: record pemda dibaca satu per satu & langsung ditulis jadi baris tabel
+            buat_tabel_pemda(map(baris_pemda, iter_pemda(DATA_PATH)))
+        else:
+            buat_tabel_pemda(tabel_pemda(muat_data_pemda(DATA_PATH)))
+    except FileNotFoundError:
+        logging.error(f"❌ File {DATA_PATH} tidak ditemukan.")
+        sys.exit()
+    except json.JSONDecodeError:
+        logging.error(f"❌ File {DATA_PATH} bukan JSON yang valid.")
+        sys.exit()
+    except Exception as e:
+        logging.error(f"❌ Gagal menyimpan file HTML: {e}")
+        sys.exit()
 
-logging.info("🎉 Proses generate tabel HTML selesai.")
+    logging.info("🎉 Proses generate tabel HTML selesai.")
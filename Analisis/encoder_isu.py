@@ -0,0 +1,341 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from kemiripan_blok import normalisasi
+from korpus_isu import MODEL_NAME
+
+# Model distilasi yg lebih kecil (keluarga e5 yg sama, 384 dimensi)
+MODEL_KECIL = 'intfloat/multilingual-e5-small'
+
+# Prefix query model e5 untuk pencarian teks bebas (isu korpus di-encode apa adanya)
+PREFIX_QUERY = "query: "
+
+# Folder hasil export ONNX (sekali export, dipakai ulang)
+ONNX_DIR = "./Output/model_onnx"
+KONFIGURASI_KUANTISASI = "avx2"
+
+BACKENDS = ("fp32", "onnx-int8", "kecil")
+
+# Jumlah token (termasuk padding) maksimal per batch encode
+TOKEN_BUDGET = 8192
+
+
+def nama_cache_backend(backend, model_name=MODEL_NAME):
+    """Nama yg dipakai jadi kunci cache embedding, biar hasil tiap backend gak tercampur"""
+    if backend == "fp32":
+        return model_name
+    if backend == "kecil":
+        return MODEL_KECIL
+    return f"{model_name}#{backend}"
+
+
+def siapkan_onnx_int8(model_name):
+    """
+    Export model ke ONNX + kuantisasi dinamis int8 (sekali) ke folder di ONNX_DIR, hasil (folder, file_name).
+    Export ditulis ke folder sementara lalu di-rename ke tempatnya, jadi proses lain gak pernah melihat model setengah jadi;
+    kalau ada proses lain yg selesai duluan, hasil proses itu yg dipakai.
+    """
+    folder = os.path.join(ONNX_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+    file_name = f"onnx/model_qint8_{KONFIGURASI_KUANTISASI}.onnx"
+    if os.path.exists(os.path.join(folder, file_name)):
+        return folder, file_name
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logging.info(f"🔧 Export {model_name} ke ONNX int8 di {folder} (cuma sekali)...")
+    os.makedirs(ONNX_DIR, exist_ok=True)
+    folder_sementara = tempfile.mkdtemp(prefix=os.path.basename(folder) + ".", dir=ONNX_DIR)
+    try:
+        model_onnx = SentenceTransformer(model_name, backend="onnx")
+        model_onnx.save_pretrained(folder_sementara)
+        export_dynamic_quantized_onnx_model(model_onnx, KONFIGURASI_KUANTISASI, folder_sementara)
+        if os.path.isdir(folder) and not os.path.exists(os.path.join(folder, file_name)):
+            # Sisa export lama yg gak lengkap (versi sebelum rename atomik)
+            shutil.rmtree(folder, ignore_errors=True)
+        try:
+            os.rename(folder_sementara, folder)
+        except OSError:
+            if not os.path.exists(os.path.join(folder, file_name)):
+                raise
+            logging.info(f"   - {folder} sudah di-export proses lain, hasil export ini dibuang")
+    finally:
+        shutil.rmtree(folder_sementara, ignore_errors=True)
+    return folder, file_name
+
+
+def _muat_onnx_int8(model_name):
+    """Load backend onnxruntime dari hasil siapkan_onnx_int8"""
+    from sentence_transformers import SentenceTransformer
+
+    folder, file_name = siapkan_onnx_int8(model_name)
+    return SentenceTransformer(folder, backend="onnx", model_kwargs={"file_name": file_name})
+
+
+def panjang_token(model, texts):
+    """Jumlah token tiap teks (sudah termasuk token spesial & dipotong di max_seq_length model)"""
+    tokens = model.tokenizer(texts, add_special_tokens=True, truncation=True, max_length=model.max_seq_length)
+    return np.fromiter((len(ids) for ids in tokens["input_ids"]), dtype=np.int64, count=len(texts))
+
+
+def batch_token_budget(panjang, token_budget=TOKEN_BUDGET):
+    """
+    Urutkan teks dari yg terpendek lalu potong jadi batch sehingga
+    jumlah_teks * panjang_terpanjang_di_batch <= token_budget (minimal 1 teks per batch).
+    Hasil: list array indeks teks per batch.
+    """
+    urutan = np.argsort(panjang, kind="stable")
+    batches, mulai = [], 0
+    for pos in range(len(urutan)):
+        # Urutan naik, jadi teks di pos ini yg terpanjang di batch berjalan
+        if pos > mulai and (pos - mulai + 1) * panjang[urutan[pos]] > token_budget:
+            batches.append(urutan[mulai:pos])
+            mulai = pos
+    if mulai < len(urutan):
+        batches.append(urutan[mulai:])
+    return batches
+
+
+def encode_berbatch(model, texts, token_budget=TOKEN_BUDGET):
+    """
+    Encode dgn batch dinamis: teks dikelompokkan per panjang token & ukuran batch ditentukan token_budget,
+    bukan jumlah teks tetap. Hasil dikembalikan sesuai urutan input.
+    """
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    mulai = time.perf_counter()
+    panjang = panjang_token(model, texts)
+    batches = batch_token_budget(panjang, token_budget)
+
+    hasil = None
+    token_terpakai = 0
+    for batch in batches:
+        emb = np.asarray(
+            model.encode([texts[i] for i in batch], batch_size=len(batch), convert_to_tensor=False, show_progress_bar=False),
+            dtype=np.float32
+        )
+        if hasil is None:
+            hasil = np.empty((len(texts), emb.shape[1]), dtype=np.float32)
+        hasil[batch] = emb
+        token_terpakai += len(batch) * int(panjang[batch].max())
+
+    durasi = time.perf_counter() - mulai
+    token_asli = int(panjang.sum())
+    logging.info(
+        f"⚡ Encode {len(texts)} teks dalam {len(batches)} batch (budget {token_budget} token): "
+        f"{token_asli} token, {token_asli / max(durasi, 1e-9):.0f} token/detik, "
+        f"padding {(token_terpakai - token_asli) / max(token_terpakai, 1) * 100:.1f}%"
+    )
+    return hasil
+
+
+def _muat_model(backend, model_name):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "fp32":
+        return SentenceTransformer(model_name)
+    if backend == "kecil":
+        return SentenceTransformer(MODEL_KECIL)
+    if backend == "onnx-int8":
+        return _muat_onnx_int8(model_name)
+    raise ValueError(f"Backend encoder '{backend}' tidak dikenal, pilih salah satu: {', '.join(BACKENDS)}")
+
+
+# Model milik proses worker (diisi _init_worker, sekali per proses)
+_model_worker = None
+_token_budget_worker = None
+
+
+def _init_worker(backend, model_name, token_budget, n_thread):
+    global _model_worker, _token_budget_worker
+    try:
+        import torch
+        torch.set_num_threads(n_thread)  # biar worker gak rebutan core
+    except ImportError:
+        pass
+    _model_worker = _muat_model(backend, model_name)
+    _token_budget_worker = token_budget
+
+
+def _dimensi_worker():
+    return _model_worker.get_sentence_embedding_dimension()
+
+
+def _encode_shard(nama_shm, shape, indeks, texts):
+    """Encode satu shard & tulis langsung ke shared memory milik parent, yg dikirim balik cuma statistik"""
+    mulai = time.perf_counter()
+    if _token_budget_worker:
+        emb = encode_berbatch(_model_worker, texts, _token_budget_worker)
+    else:
+        emb = _model_worker.encode(texts, convert_to_tensor=False, show_progress_bar=False)
+
+    # Worker hasil spawn pakai resource tracker parent, jadi attach biasa gak bikin shm ke-unlink duluan
+    shm = shared_memory.SharedMemory(name=nama_shm)
+    try:
+        hasil = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        hasil[indeks] = emb
+        del hasil
+    finally:
+        shm.close()
+    return os.getpid(), len(texts), time.perf_counter() - mulai
+
+
+class PoolEncoder:
+    """
+    Encode paralel: teks dibagi ke n_worker proses (model di-load sekali per worker),
+    hasil ditulis ke satu buffer shared memory jadi array besar gak perlu di-pickle balik.
+    """
+
+    def __init__(self, backend, model_name, n_worker, token_budget=TOKEN_BUDGET):
+        self.n_worker = n_worker
+        n_thread = max(1, (os.cpu_count() or 1) // n_worker)
+        if backend == "onnx-int8":
+            # Export cukup sekali di parent, worker tinggal load (gak ada n_worker proses export ke folder yg sama)
+            siapkan_onnx_int8(model_name)
+        # spawn: aman di Windows & gak ikut mewarisi state torch/tokenizer parent
+        self.pool = multiprocessing.get_context("spawn").Pool(
+            n_worker, initializer=_init_worker, initargs=(backend, model_name, token_budget, n_thread)
+        )
+        self.dimensi = self.pool.apply(_dimensi_worker)
+        atexit.register(self.tutup)
+
+    def encode(self, texts):
+        if not texts:
+            return np.zeros((0, self.dimensi), dtype=np.float32)
+
+        shape = (len(texts), self.dimensi)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+        try:
+            # Shard round-robin setelah diurutkan per panjang teks, biar beban tiap shard seimbang
+            urutan = np.argsort([len(t) for t in texts], kind="stable")
+            n_shard = min(len(texts), self.n_worker * 4)
+            tugas = []
+            for k in range(n_shard):
+                indeks = urutan[k::n_shard]
+                tugas.append((shm.name, shape, indeks, [texts[i] for i in indeks]))
+
+            mulai = time.perf_counter()
+            statistik = defaultdict(lambda: [0, 0.0])
+            for pid, jumlah, durasi in self.pool.starmap(_encode_shard, tugas):
+                statistik[pid][0] += jumlah
+                statistik[pid][1] += durasi
+            total_durasi = time.perf_counter() - mulai
+
+            for pid, (jumlah, durasi) in sorted(statistik.items()):
+                logging.info(f"   - Worker {pid}: {jumlah} teks, {durasi:.2f} dtk ({jumlah / max(durasi, 1e-9):.1f} teks/detik)")
+            logging.info(
+                f"🧵 Encode {len(texts)} teks pakai {self.n_worker} worker: {total_durasi:.2f} dtk "
+                f"({len(texts) / max(total_durasi, 1e-9):.1f} teks/detik)"
+            )
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def tutup(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+def muat_encoder(backend="fp32", model_name=MODEL_NAME, show_progress_bar=True, token_budget=TOKEN_BUDGET, workers=1):
+    """
+    Load encoder sesuai backend, hasil: (fungsi encode(list_teks) -> array, nama_cache).
+    fp32      : sentence-transformers biasa (baseline)
+    onnx-int8 : graph ONNX dgn kuantisasi dinamis int8 (butuh `pip install sentence-transformers[onnx]`)
+    kecil     : model distilasi multilingual-e5-small
+    token_budget > 0 -> batch dinamis per panjang token (encode_berbatch), 0/None -> model.encode biasa.
+    workers > 1 -> encode dibagi ke beberapa proses (PoolEncoder), model gak di-load di proses utama.
+    """
+    if workers > 1:
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend encoder '{backend}' tidak dikenal, pilih salah satu: {', '.join(BACKENDS)}")
+        pool = PoolEncoder(backend, model_name, workers, token_budget)
+        return pool.encode, nama_cache_backend(backend, model_name)
+
+    model = _muat_model(backend, model_name)
+
+    def encode_isu(texts):
+        if token_budget:
+            return encode_berbatch(model, texts, token_budget)
+        return model.encode(texts, convert_to_tensor=False, show_progress_bar=show_progress_bar)
+
+    return encode_isu, nama_cache_backend(backend, model_name)
+
+
+def muat_encoder_malas(backend="fp32", model_name=MODEL_NAME, show_progress_bar=True, token_budget=TOKEN_BUDGET, workers=1):
+    """
+    Sama kayak muat_encoder, tapi model baru di-load waktu encode pertama kali dipanggil.
+    Kalau semua embedding sudah ada di cache, model gak pernah di-load sama sekali.
+    """
+    encoder = {}
+
+    def encode_isu(texts):
+        if "encode" not in encoder:
+            logging.info(f"📦 Memuat model semantik (backend {backend})...")
+            mulai = time.perf_counter()
+            encoder["encode"], _ = muat_encoder(backend, model_name, show_progress_bar, token_budget, workers)
+            logging.info(f"✅ Model berhasil dimuat ({time.perf_counter() - mulai:.1f} dtk).")
+        return encoder["encode"](texts)
+
+    return encode_isu, nama_cache_backend(backend, model_name)
+
+
+def ukur_latensi(encode_fn, texts):
+    """
+    Detik per teks untuk encode_fn (tanpa cache).
+    Ada satu panggilan pemanasan dulu yg gak ikut diukur: encoder dari muat_encoder_malas baru load model
+    di panggilan pertama, jadi tanpa ini waktu load model ikut kehitung sebagai latensi.
+    """
+    if not texts:
+        return 0.0
+    encode_fn(texts[:1])
+    mulai = time.perf_counter()
+    encode_fn(texts)
+    return (time.perf_counter() - mulai) / len(texts)
+
+
+def cek_akurasi(emb_acuan, emb_uji, k=10, n_sampel=200, seed=0):
+    """
+    Bandingkan tetangga top-k tiap isu sampel: backend uji vs baseline fp32.
+    Kedua embedding harus urutannya sama (baris = teks yg sama), dimensinya boleh beda.
+    """
+    acuan, uji = normalisasi(emb_acuan), normalisasi(emb_uji)
+    n = len(acuan)
+    k = min(k, n - 1)
+    if k <= 0:
+        return {"recall_at_k": 1.0, "selisih_skor_rata2": 0.0, "k": 0, "n_sampel": 0}
+
+    rng = np.random.default_rng(seed)
+    sampel = rng.choice(n, size=min(n_sampel, n), replace=False)
+
+    skor_acuan = acuan[sampel] @ acuan.T
+    skor_uji = uji[sampel] @ uji.T
+    baris = np.arange(len(sampel))
+    skor_acuan[baris, sampel] = -np.inf  # diri sendiri bukan tetangga
+    skor_uji[baris, sampel] = -np.inf
+
+    top_acuan = np.argpartition(-skor_acuan, k - 1, axis=1)[:, :k]
+    top_uji = np.argpartition(-skor_uji, k - 1, axis=1)[:, :k]
+    irisan = [len(np.intersect1d(a, u)) for a, u in zip(top_acuan, top_uji)]
+
+    selisih = np.abs(
+        np.take_along_axis(skor_acuan, top_acuan, axis=1) - np.take_along_axis(skor_uji, top_acuan, axis=1)
+    )
+    return {
+        "recall_at_k": float(np.mean(irisan) / k),
+        "selisih_skor_rata2": float(selisih.mean()),
+        "k": int(k),
+        "n_sampel": int(len(sampel)),
+    }
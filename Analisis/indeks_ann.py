@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from cache_embedding import CACHE_DIR
+from kemiripan_blok import kelompokkan_per_isu
+from klaster_kmeans import kmeans_sferis, tetapkan_klaster
+
+N_PROBE = 8
+MAKS_SAMPEL_LATIH = 50000
+
+
+class IndeksIVF:
+    """
+    Index IVF-flat pure NumPy di atas embedding teks unik:
+    tiap teks masuk ke list centroid terdekat, query cuma mengecek n_probe list terdekat.
+    """
+
+    def __init__(self, centroid, list_indptr, list_anggota):
+        self.centroid = np.asarray(centroid, dtype=np.float32)
+        self.list_indptr = np.asarray(list_indptr, dtype=np.int64)
+        self.list_anggota = np.asarray(list_anggota, dtype=np.int64)
+
+    @classmethod
+    def bangun(cls, emb_norm, n_list=None, seed=0):
+        n = len(emb_norm)
+        if n_list is None:
+            n_list = int(np.sqrt(n)) or 1
+        rng = np.random.default_rng(seed)
+        latih = emb_norm
+        if n > MAKS_SAMPEL_LATIH:
+            latih = emb_norm[rng.choice(n, MAKS_SAMPEL_LATIH, replace=False)]
+
+        centroid = kmeans_sferis(latih, n_list, seed=seed)
+        label = tetapkan_klaster(emb_norm, centroid)
+        urutan = np.argsort(label, kind="stable")
+        list_indptr = np.r_[0, np.cumsum(np.bincount(label, minlength=len(centroid)))]
+        return cls(centroid, list_indptr, urutan)
+
+    def kandidat(self, query_norm, n_probe=N_PROBE):
+        """Yield array id teks unik kandidat untuk tiap baris query_norm"""
+        n_probe = min(n_probe, len(self.centroid))
+        skor_list = query_norm @ self.centroid.T
+        list_terdekat = np.argpartition(-skor_list, n_probe - 1, axis=1)[:, :n_probe]
+        for lists in list_terdekat:
+            yield np.concatenate([
+                self.list_anggota[self.list_indptr[l]:self.list_indptr[l + 1]] for l in lists
+            ])
+
+    def simpan(self, path):
+        np.savez(path, centroid=self.centroid, list_indptr=self.list_indptr, list_anggota=self.list_anggota)
+
+    @classmethod
+    def muat(cls, path):
+        with np.load(path) as f:
+            return cls(f["centroid"], f["list_indptr"], f["list_anggota"])
+
+
+def indeks_dengan_cache(emb_norm, nama_model, n_list=None, cache_dir=CACHE_DIR):
+    """Load index IVF dari samping cache embedding, atau bangun & simpan kalau embedding-nya berubah"""
+    sidik = hashlib.sha256(np.ascontiguousarray(emb_norm).tobytes()).hexdigest()[:16]
+    slug = "".join(c if c.isalnum() or c in "_.-" else "_" for c in nama_model)
+    path = os.path.join(cache_dir, f"{slug}.ivf_{n_list or 'auto'}_{sidik}.npz")
+
+    if os.path.exists(path):
+        try:
+            indeks = IndeksIVF.muat(path)
+            logging.info(f"💾 Index ANN dimuat dari {path}")
+            return indeks
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"⚠️ Index ANN tidak bisa dibaca, dibangun ulang: {e}")
+
+    indeks = IndeksIVF.bangun(emb_norm, n_list)
+    logging.info(f"🧭 Index ANN dibangun: {len(indeks.centroid)} list untuk {len(emb_norm)} teks unik.")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        indeks.simpan(path)
+    except OSError as e:
+        logging.warning(f"⚠️ Gagal menyimpan index ANN: {e}")
+    return indeks
+
+
+def kandidat_ann(indeks, emb_norm, query_idx, region, threshold, inverse, n_probe=N_PROBE, block_size=1024):
+    """
+    Versi ANN dari kemiripan_blok.kandidat_edge: kandidat diambil dari n_probe list terdekat,
+    lalu di-rerank exact (dot product float32 penuh) supaya skornya tetap persis.
+    Pasangan beda daerah yg skornya >= threshold langsung direduksi per blok query jadi pemenang per daerah
+    (tiap isu query cuma ada di satu blok), jadi gak ada list semua pasangan yg menumpuk.
+    Hasil: (dict {i: (array j, array skor)} urut skor tertinggi, jumlah pasangan yg lolos threshold).
+    """
+    # Peta teks unik -> isu (CSR), buat menyebar kandidat teks unik ke semua isu yg teksnya sama
+    isu_urut = np.argsort(inverse, kind="stable")
+    isu_indptr = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(emb_norm)))]
+
+    query_idx = np.asarray(query_idx, dtype=np.int64)
+    hasil, n_pasangan = {}, 0
+    for start in range(0, len(query_idx), block_size):
+        rows = query_idx[start:start + block_size]
+        hasil_i, hasil_j, hasil_skor = [], [], []
+        query_norm = emb_norm[inverse[rows]]
+        for i, vektor, kandidat_unik in zip(rows, query_norm, indeks.kandidat(query_norm, n_probe)):
+            skor = emb_norm[kandidat_unik] @ vektor
+            lolos = skor >= threshold
+            kandidat_unik, skor = kandidat_unik[lolos], skor[lolos]
+            if not len(kandidat_unik):
+                continue
+
+            # Sebar ke isu: tiap teks unik bisa dipakai beberapa isu
+            jumlah = isu_indptr[kandidat_unik + 1] - isu_indptr[kandidat_unik]
+            offset = np.arange(jumlah.sum()) - np.repeat(np.cumsum(jumlah) - jumlah, jumlah)
+            j = isu_urut[np.repeat(isu_indptr[kandidat_unik], jumlah) + offset]
+            skor_j = np.repeat(skor, jumlah)
+
+            beda_daerah = region[j] != region[i]
+            hasil_i.append(np.full(int(beda_daerah.sum()), i, dtype=np.int64))
+            hasil_j.append(j[beda_daerah])
+            hasil_skor.append(skor_j[beda_daerah])
+
+        if hasil_i:
+            blok_i, blok_j, blok_skor = np.concatenate(hasil_i), np.concatenate(hasil_j), np.concatenate(hasil_skor)
+            n_pasangan += len(blok_skor)
+            kelompokkan_per_isu(hasil, blok_i, blok_j, blok_skor, region)
+    return hasil, n_pasangan
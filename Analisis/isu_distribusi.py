@@ -9,19 +9,8 @@ from collections import Counter
 import matplotlib.pyplot as plt
 import base64
 from io import BytesIO
-
-# --- SETUP LOGGING ---
-output_dir = Path(r"D:\testing magang\Analisis_isu_PythonFile-main\Output")
-output_dir.mkdir(parents=True, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(output_dir / "proses.log", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from data_pemda import muat_data_pemda, semua_isu, tabel_pemda
+from matriks_tema import matriks_tema_dengan_cache
 
 # --- KAMUS TEMA ISU STRATEGIS ---
 common_themes = {
@@ -117,81 +106,44 @@ common_themes = {
     "Narkoba": ["narkoba"]
 }
 
-# Path file input/output
-input_path = Path(r"D:\testing magang\Analisis_isu_PythonFile-main\Data\data_pemda.json")
-html_path = output_dir / "distribusi_isu.html"
-excel_path = output_dir / "distribusi_isu.xlsx"
-
-# Load JSON
-try:
-    with open(input_path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    logging.info(f"✅ File {input_path} berhasil dimuat.")
-except FileNotFoundError:
-    logging.error(f"❌ File {input_path} tidak ditemukan.")
-    sys.exit()
-except json.JSONDecodeError:
-    logging.error(f"❌ File {input_path} bukan JSON yang valid.")
-    sys.exit()
-
-# Ambil bagian data aja
-data = raw.get("data", raw)
-
-# Kumpulkan semua isu
-all_issues = []
-for item in data:
-    isu = item.get("data", [])
-    if isinstance(isu, list):
-        for i in isu:
-            if isinstance(i, dict):
-                val = str(i.get("kategori", "")).strip().lower()
-                if val:
-                    all_issues.append(val)
-            elif isinstance(i, str):
-                all_issues.append(i.strip().lower())
-    elif isinstance(isu, str):
-        all_issues.append(isu.strip().lower())
-
-logging.info(f"📊 Total isu terkumpul: {len(all_issues)}")
-
-# --- Mapping isu ke tema ---
-mapped = []
-for isu in all_issues:
-    found = False
-    for tema, keywords in common_themes.items():
-        if any(k in isu for k in keywords):
-            mapped.append(tema)
-            found = True
-            break
-    if not found:
-        mapped.append("Lainnya")
-
-counter = Counter(mapped)
-df = pd.DataFrame(counter.items(), columns=["Tema", "Jumlah"]).sort_values(by="Jumlah", ascending=False)
-
-# --- Simpan ke Excel ---
-df.to_excel(excel_path, index=False, engine="openpyxl")
-logging.info(f"📂 Hasil distribusi isu juga disimpan di {excel_path}")
-
-# --- Grafik ---
-plt.figure(figsize=(10, 6))
-df.head(10).plot(kind="bar", x="Tema", y="Jumlah", legend=False, color="skyblue")
-plt.title("Top 10 Distribusi Isu Strategis (Tema)")
-plt.xlabel("Tema")
-plt.ylabel("Jumlah")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout()
-
-buf = BytesIO()
-plt.savefig(buf, format="png", bbox_inches="tight")
-plt.close()
-buf.seek(0)
-img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-
-# --- HTML ---
-table_html = df.to_html(index=False, escape=False)
-
-html = f"""<!doctype html>
+
+
+def buat_distribusi_tema(all_issues, html_path, excel_path, cache_dir):
+    """Distribusi isu per tema (tema pertama yg cocok) ke Excel & HTML + grafik, hasil: Counter tema"""
+    logging.info(f"📊 Total isu terkumpul: {len(all_issues)}")
+
+    # --- Mapping isu ke tema ---
+    # Tiap isu masuk ke tema pertama (urutan common_themes) yg keyword-nya cocok
+    nama_tema = list(common_themes.keys())
+    matriks_tema = matriks_tema_dengan_cache(all_issues, list(common_themes.values()), cache_dir)
+    mapped = [nama_tema[t] if t >= 0 else "Lainnya" for t in matriks_tema.tema_pertama()]
+
+    counter = Counter(mapped)
+    df = pd.DataFrame(counter.items(), columns=["Tema", "Jumlah"]).sort_values(by="Jumlah", ascending=False)
+
+    # --- Simpan ke Excel ---
+    df.to_excel(excel_path, index=False, engine="openpyxl")
+    logging.info(f"📂 Hasil distribusi isu juga disimpan di {excel_path}")
+
+    # --- Grafik ---
+    plt.figure(figsize=(10, 6))
+    df.head(10).plot(kind="bar", x="Tema", y="Jumlah", legend=False, color="skyblue")
+    plt.title("Top 10 Distribusi Isu Strategis (Tema)")
+    plt.xlabel("Tema")
+    plt.ylabel("Jumlah")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+
+    buf = BytesIO()
+    plt.savefig(buf, format="png", bbox_inches="tight")
+    plt.close("all")
+    buf.seek(0)
+    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
+
+    # --- HTML ---
+    table_html = df.to_html(index=False, escape=False)
+
+    html = f"""<!doctype html>
 <html lang="id">
 <head>
 <meta charset="utf-8">
@@ -236,5 +188,40 @@ html = f"""<!doctype html>
 </body>
 </html>"""
 
-html_path.write_text(html, encoding="utf-8")
-logging.info(f"📂 Hasil distribusi isu berdasarkan tema disimpan di {html_path}")
+    html_path.write_text(html, encoding="utf-8")
+    logging.info(f"📂 Hasil distribusi isu berdasarkan tema disimpan di {html_path}")
+    return counter
+
+
+if __name__ == "__main__":
+    # --- SETUP LOGGING ---
+    output_dir = Path(r"D:\testing magang\Analisis_isu_PythonFile-main\Output")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(output_dir / "proses.log", encoding="utf-8"),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    # Path file input/output
+    input_path = Path(r"D:\testing magang\Analisis_isu_PythonFile-main\Data\data_pemda.json")
+    html_path = output_dir / "distribusi_isu.html"
+    excel_path = output_dir / "distribusi_isu.xlsx"
+
+    # Load JSON
+    try:
+        data = muat_data_pemda(input_path)
+        logging.info(f"✅ File {input_path} berhasil dimuat.")
+    except FileNotFoundError:
+        logging.error(f"❌ File {input_path} tidak ditemukan.")
+        sys.exit()
+    except json.JSONDecodeError:
+        logging.error(f"❌ File {input_path} bukan JSON yang valid.")
+        sys.exit()
+
+    # Kumpulkan semua isu
+    buat_distribusi_tema(semua_isu(tabel_pemda(data)), html_path, excel_path, output_dir / "cache_tema")
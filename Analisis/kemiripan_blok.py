@@ -0,0 +1,226 @@
+import numpy as np
+
+# Jumlah baris isu yg dibandingkan sekaligus. Memori puncak ~ block_size x jumlah isu x 4 byte (blok skor)
+# + pemenang per (isu, daerah pembanding), karena pasangan yg lolos threshold langsung direduksi tiap blok
+BLOCK_SIZE = 1024
+
+
+def normalisasi(embeddings):
+    """L2-normalisasi tiap baris (float32), jadi cosine similarity = dot product biasa"""
+    emb = np.asarray(embeddings, dtype=np.float32)
+    norm = np.linalg.norm(emb, axis=1, keepdims=True)
+    norm[norm == 0] = 1.0
+    return emb / norm
+
+
+# Toleransi skor pass kasar (bentuk ringkas) supaya kandidat yg skor exact-nya >= threshold gak kebuang
+MARGIN_KOMPAK = {"float16": 0.01, "int8": 0.03}
+
+# Jumlah baris kolom yg di-upcast ke float32 sekaligus waktu pass kasar
+KOLOM_CHUNK = 8192
+
+
+def kompres_embedding(emb_norm, mode):
+    """
+    Simpan embedding ter-normalisasi dalam bentuk ringkas: (data, skala).
+    float16: skala None. int8: skala per vektor = max |x| / 127.
+    """
+    if mode == "float16":
+        return np.asarray(emb_norm, dtype=np.float16), None
+    if mode == "int8":
+        data = np.empty(emb_norm.shape, dtype=np.int8)
+        skala = np.empty(len(emb_norm), dtype=np.float32)
+        # Per chunk biar gak perlu salinan float32 penuh (emb_norm bisa memmap)
+        for start in range(0, len(emb_norm), KOLOM_CHUNK):
+            emb = np.asarray(emb_norm[start:start + KOLOM_CHUNK], dtype=np.float32)
+            skala_chunk = np.abs(emb).max(axis=1) / 127.0
+            skala_chunk[skala_chunk == 0] = 1.0
+            data[start:start + len(emb)] = np.clip(np.rint(emb / skala_chunk[:, None]), -127, 127)
+            skala[start:start + len(emb)] = skala_chunk
+        return data, skala
+    raise ValueError(f"Mode penyimpanan '{mode}' tidak dikenal (float16/int8).")
+
+
+def dot_kompak(kompak, baris, kolom):
+    """
+    Skor kasar baris x kolom dari bentuk ringkas.
+    NumPy gak punya GEMM int8/float16, jadi kolom di-upcast per chunk biar memori tetap kecil.
+    """
+    data, skala = kompak
+    kiri = data[baris].astype(np.float32)
+    hasil = np.empty((len(baris), len(kolom)), dtype=np.float32)
+    for start in range(0, len(kolom), KOLOM_CHUNK):
+        potong = kolom[start:start + KOLOM_CHUNK]
+        hasil[:, start:start + len(potong)] = kiri @ data[potong].astype(np.float32).T
+    if skala is not None:
+        hasil *= skala[baris][:, None]
+        hasil *= skala[kolom][None, :]
+    return hasil
+
+
+def skor_ulang_exact(emb_norm, teks_baris, r, teks_kolom):
+    """
+    Skor exact float32 untuk kandidat (baris blok r, teks kolom) yg lolos pass kasar.
+    Dihitung per chunk teks kolom unik pakai matmul baris blok x kolom chunk, lalu entri yg dibutuhkan diambil;
+    jadi memori ~ blok x KOLOM_CHUNK, bukan salinan vektor per pasangan (pasangan x dim).
+    """
+    skor = np.empty(len(r), dtype=np.float32)
+    if not len(r):
+        return skor
+    kiri = np.asarray(emb_norm[teks_baris], dtype=np.float32)
+    kolom_unik, posisi = np.unique(teks_kolom, return_inverse=True)
+    urutan = np.argsort(posisi, kind="stable")
+    batas = np.searchsorted(posisi[urutan], np.arange(0, len(kolom_unik) + KOLOM_CHUNK, KOLOM_CHUNK))
+    for c, start in enumerate(range(0, len(kolom_unik), KOLOM_CHUNK)):
+        potong = kolom_unik[start:start + KOLOM_CHUNK]
+        skor_chunk = kiri @ np.asarray(emb_norm[potong], dtype=np.float32).T
+        pilih = urutan[batas[c]:batas[c + 1]]
+        skor[pilih] = skor_chunk[r[pilih], posisi[pilih] - start]
+    return skor
+
+
+def kode_daerah(nama_daerah_per_isu):
+    """Ubah nama pemda tiap isu jadi kode integer (buat masking & reduksi per daerah)"""
+    nama_unik, kode = np.unique(np.asarray(nama_daerah_per_isu, dtype=object), return_inverse=True)
+    return kode.astype(np.int64), list(nama_unik)
+
+
+def terbaik_per_daerah(i_arr, j_arr, skor_arr, region):
+    """
+    Segment-max per (isu i, daerah pembanding): sisakan 1 pasangan dgn skor tertinggi.
+    Kalau skornya sama, j terkecil yg menang (sama kayak loop lama).
+    """
+    if not len(i_arr):
+        return i_arr, j_arr, skor_arr
+
+    region_j = region[j_arr]
+    order = np.lexsort((j_arr, -skor_arr, region_j, i_arr))
+    i_urut, region_urut = i_arr[order], region_j[order]
+    awal_segmen = np.ones(len(order), dtype=bool)
+    awal_segmen[1:] = (i_urut[1:] != i_urut[:-1]) | (region_urut[1:] != region_urut[:-1])
+    pilih = order[awal_segmen]
+    return i_arr[pilih], j_arr[pilih], skor_arr[pilih]
+
+
+def edge_blok(emb_norm, query_idx, region, threshold, block_size=BLOCK_SIZE, inverse=None, kompak=None, margin=0.0):
+    """
+    Bandingkan isu query (per blok baris) dengan isu lain secara simetris:
+    tiap pasangan tak berurut (a, b) beda daerah cuma dihitung sekali.
+    Isu diurutkan [non-query..., query...], lalu blok baris query cuma dibandingkan
+    dengan kolom di posisi sebelumnya (segitiga bawah), jadi kerja query x query kepotong setengah.
+    Kalau kompak diisi (hasil kompres_embedding), pass kasar pakai bentuk ringkas dgn threshold - margin,
+    lalu cuma yg lolos di-skor ulang float32 dari emb_norm (boleh memmap).
+    Yield (a, b, skor) dengan a = isu query.
+    """
+    n_isu = len(region)
+    if inverse is None:
+        inverse = np.arange(n_isu, dtype=np.int64)
+    query_idx = np.unique(np.asarray(query_idx, dtype=np.int64))
+    is_query = np.zeros(n_isu, dtype=bool)
+    is_query[query_idx] = True
+    urutan = np.concatenate([np.flatnonzero(~is_query), query_idx])
+    n_non_query = n_isu - len(query_idx)
+
+    for start in range(n_non_query, n_isu, block_size):
+        stop = min(start + block_size, n_isu)
+        rows, kolom = urutan[start:stop], urutan[:stop]
+
+        # Cukup kalikan dengan teks unik yg muncul di kolom
+        kolom_unik, peta_kolom = np.unique(inverse[kolom], return_inverse=True)
+        if kompak is None:
+            skor = (emb_norm[inverse[rows]] @ emb_norm[kolom_unik].T)[:, peta_kolom]
+        else:
+            skor = dot_kompak(kompak, inverse[rows], kolom_unik)[:, peta_kolom]
+
+        mask = np.arange(stop)[None, :] < np.arange(start, stop)[:, None]
+        mask &= skor >= threshold - (margin if kompak is not None else 0.0)
+        mask &= region[rows][:, None] != region[kolom][None, :]
+        r, c = np.nonzero(mask)
+        a, b = rows[r], kolom[c]
+
+        if kompak is None:
+            yield a, b, skor[r, c]
+            continue
+
+        skor_exact = skor_ulang_exact(emb_norm, inverse[rows], r, inverse[b])
+        lolos = skor_exact >= threshold
+        yield a[lolos], b[lolos], skor_exact[lolos]
+
+
+def _gabung_pemenang(pemenang, tertunda, region):
+    """Gabung pemenang berjalan dengan pemenang blok-blok yg tertunda, lalu reduksi ulang per (isu, daerah)"""
+    if not tertunda:
+        return pemenang
+    return terbaik_per_daerah(*(np.concatenate(x) for x in zip(pemenang, *tertunda)), region)
+
+
+def kandidat_edge(emb_norm, query_idx, region, threshold, block_size=BLOCK_SIZE, inverse=None, kompak=None,
+                  margin=0.0, query_arah=None):
+    """
+    Kandidat terbaik per daerah dari edge simetris (edge_blok), direduksi per blok:
+    edge tiap blok langsung diturunkan ke dua arah (i -> j, dan j -> i kalau j ada di query_arah),
+    dipangkas jadi pemenang per (isu, daerah), lalu digabung ke pemenang berjalan.
+    Jadi yg disimpan cuma ~ block_size x N (blok skor) + N x jumlah daerah (pemenang), bukan semua pasangan lolos.
+    query_arah default = query_idx.
+    Hasil: (dict {i: (array j, array skor)} urut skor tertinggi, jumlah pasangan yg lolos threshold).
+    """
+    n_isu = len(region)
+    is_query = np.zeros(n_isu, dtype=bool)
+    is_query[np.asarray(query_idx if query_arah is None else query_arah, dtype=np.int64)] = True
+
+    kosong = np.zeros(0, dtype=np.int64)
+    pemenang = (kosong, kosong, np.zeros(0, dtype=np.float32))
+    tertunda, n_tertunda, n_pasangan = [], 0, 0
+    for a, b, skor in edge_blok(emb_norm, query_idx, region, threshold, block_size, inverse, kompak, margin):
+        n_pasangan += len(skor)
+        skor = skor.astype(np.float32, copy=False)
+        balik = is_query[b]
+        blok = terbaik_per_daerah(
+            np.concatenate([a, b[balik]]), np.concatenate([b, a[balik]]), np.concatenate([skor, skor[balik]]), region
+        )
+        tertunda.append(blok)
+        n_tertunda += len(blok[0])
+        # Digabung begitu yg tertunda sudah sebanyak pemenang berjalan (amortized, biaya sort gak kuadratik)
+        if n_tertunda >= max(len(pemenang[0]), block_size):
+            pemenang = _gabung_pemenang(pemenang, tertunda, region)
+            tertunda, n_tertunda = [], 0
+    pemenang = _gabung_pemenang(pemenang, tertunda, region)
+
+    hasil = {}
+    kelompokkan_per_isu(hasil, *pemenang, region)
+    return hasil, n_pasangan
+
+
+def kelompokkan_per_isu(hasil, i_arr, j_arr, skor_arr, region):
+    """Reduksi per daerah lalu masukkan ke dict {i: (array j, array skor)} urut skor tertinggi"""
+    i_arr, j_arr, skor_arr = terbaik_per_daerah(i_arr, j_arr, skor_arr, region)
+    if not len(i_arr):
+        return
+    order = np.lexsort((j_arr, -skor_arr, i_arr))
+    i_arr, j_arr, skor_arr = i_arr[order], j_arr[order], skor_arr[order]
+    batas = np.flatnonzero(np.diff(i_arr)) + 1
+    for i, j_isu, skor_isu in zip(i_arr[np.r_[0, batas]], np.split(j_arr, batas), np.split(skor_arr, batas)):
+        hasil[int(i)] = (j_isu, skor_isu)
+
+
+def agregasi_daerah(kandidat_isu, region, n_daerah):
+    """
+    Matriks daerah x daerah dari kandidat per isu (pemenang per daerah):
+    jumlah[A, B] = banyak isu A yg punya pasangan di B, rata2[A, B] = rata-rata skor pasangan terbaiknya.
+    Direduksi pakai bincount di indeks datar A * n_daerah + B.
+    """
+    jumlah = np.zeros((n_daerah, n_daerah), dtype=np.int64)
+    rata2 = np.zeros((n_daerah, n_daerah), dtype=np.float64)
+    if not kandidat_isu:
+        return jumlah, rata2
+
+    i_arr = np.fromiter(kandidat_isu.keys(), dtype=np.int64, count=len(kandidat_isu))
+    panjang = np.fromiter((len(j) for j, _ in kandidat_isu.values()), dtype=np.int64, count=len(kandidat_isu))
+    j_arr = np.concatenate([j for j, _ in kandidat_isu.values()])
+    skor_arr = np.concatenate([skor for _, skor in kandidat_isu.values()]).astype(np.float64)
+
+    datar = np.repeat(region[i_arr], panjang) * n_daerah + region[j_arr]
+    jumlah[:] = np.bincount(datar, minlength=n_daerah * n_daerah).reshape(n_daerah, n_daerah)
+    total = np.bincount(datar, weights=skor_arr, minlength=n_daerah * n_daerah).reshape(n_daerah, n_daerah)
+    np.divide(total, jumlah, out=rata2, where=jumlah > 0)
+    return jumlah, rata2
@@ -0,0 +1,147 @@
+import atexit
+import csv
+import json
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from cache_embedding import CACHE_DIR, encode_dengan_cache
+from encoder_isu import BACKENDS, muat_encoder_malas
+from klaster_kmeans import kmeans_minibatch_sferis, tetapkan_klaster
+from korpus_isu import KorpusIsu
+
+OUTPUT_DIR = "./Output/klaster_isu"
+
+# --- SETUP LOGGING ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("./Output/proses.log", encoding="utf-8"),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+# PARSE ARGUMEN
+parser = argparse.ArgumentParser(description="Klaster isu strategis nasional (mini-batch k-means) + keanggotaan pemda")
+parser.add_argument("--n-klaster", type=int, default=None, help="Jumlah klaster (default: akar(teks unik / 2))")
+parser.add_argument("--batch-size", type=int, default=1024, help="Jumlah isu per mini-batch")
+parser.add_argument("--n-iter", type=int, default=100, help="Jumlah iterasi mini-batch")
+parser.add_argument("--seed", type=int, default=0, help="Seed acak (inisialisasi & sampling batch)")
+parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="Folder cache embedding isu")
+parser.add_argument("--batas-kata", action="store_true", help="Keyword tema harus cocok sebagai kata utuh, bukan substring")
+parser.add_argument("--encoder", choices=BACKENDS, default="fp32", help="Backend encoder (sama dengan analisis_isu.py biar cache kepakai)")
+args = parser.parse_args()
+
+
+# LOAD DATA PEMDA & KAMUS TEMA
+try:
+    with open('./Data/data_pemda.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with open('./Data/kamus_tema.json', 'r', encoding='utf-8') as f:
+        kamus_raw = json.load(f)
+except FileNotFoundError as e:
+    logging.error(f"File data tidak ditemukan: {e.filename}")
+    sys.exit()
+
+korpus = KorpusIsu(data, kamus_raw, batas_kata=args.batas_kata)
+if not korpus.teks_unik:
+    logging.error("Tidak ada isu untuk diklaster.")
+    sys.exit()
+
+# EMBEDDING (dari cache analisis_isu.py, model cuma di-load kalau ada isu yg belum ter-cache)
+# Versi ter-normalisasi ditaruh di file memmap (dihapus lagi waktu keluar), k-means cuma baca per batch/blok
+encode_isu, nama_cache = muat_encoder_malas(args.encoder)
+try:
+    korpus.pasang_embedding(
+        encode_dengan_cache(korpus.teks_unik, nama_cache, encode_isu, args.cache_dir),
+        folder_mmap=args.cache_dir, pakai_mmap=True
+    )
+except Exception as e:
+    logging.critical(f"Gagal memuat model / meng-encode isu: {e}")
+    sys.exit()
+atexit.register(korpus.lepas_embedding)
+emb_norm = korpus.embedding_norm
+
+# MINI-BATCH K-MEANS di teks unik
+n_klaster = args.n_klaster or max(1, int(np.sqrt(len(emb_norm) / 2)))
+logging.info(f"🧩 Mini-batch k-means: {n_klaster} klaster, {len(emb_norm)} teks unik, batch {args.batch_size} x {args.n_iter} iterasi")
+mulai = time.perf_counter()
+centroid = kmeans_minibatch_sferis(emb_norm, n_klaster, args.batch_size, args.n_iter, args.seed)
+label_unik = tetapkan_klaster(emb_norm, centroid)
+n_klaster = len(centroid)
+logging.info(f"   - Selesai dalam {time.perf_counter() - mulai:.2f} dtk")
+
+# Skor tiap teks unik ke centroid-nya, buat cari isu representatif (paling dekat centroid)
+skor_unik = np.empty(len(emb_norm), dtype=np.float32)
+for start in range(0, len(emb_norm), 4096):
+    blok = np.asarray(emb_norm[start:start + 4096], dtype=np.float32)
+    skor_unik[start:start + len(blok)] = np.einsum("ij,ij->i", blok, centroid[label_unik[start:start + len(blok)]])
+urutan = np.lexsort((-skor_unik, label_unik))
+awal_klaster = np.flatnonzero(np.r_[True, np.diff(label_unik[urutan]) != 0])
+representatif_unik = dict(zip(label_unik[urutan][awal_klaster].tolist(), urutan[awal_klaster].tolist()))
+
+# Label per isu (lewat indeks teks unik), lalu reduksi klaster x pemda & klaster x tema pakai bincount
+label_isu = label_unik[korpus.inverse_isu]
+n_daerah = len(korpus.nama_region)
+anggota_pemda = np.bincount(
+    label_isu * n_daerah + korpus.kode_region, minlength=n_klaster * n_daerah
+).reshape(n_klaster, n_daerah)
+
+matriks_tema = korpus.matriks_tema
+baris_tema = np.repeat(np.arange(matriks_tema.n_isu), np.diff(matriks_tema.indptr))
+n_tema = len(korpus.tema_ids)
+anggota_tema = np.bincount(
+    label_isu[baris_tema] * n_tema + matriks_tema.indices, minlength=n_klaster * n_tema
+).reshape(n_klaster, n_tema)
+
+# Isu pertama (urutan data) untuk tiap teks unik representatif
+isu_pertama = np.unique(korpus.inverse_isu, return_index=True)[1]
+
+ringkasan = []
+for k in range(n_klaster):
+    if k not in representatif_unik:
+        continue  # klaster kosong
+    isu_rep = korpus.all_individual_issues[isu_pertama[representatif_unik[k]]]
+    tema_urut = np.argsort(-anggota_tema[k], kind="stable")[:3]
+    ringkasan.append({
+        "klaster": k,
+        "jumlah_isu": int(anggota_pemda[k].sum()),
+        "jumlah_pemda": int(np.count_nonzero(anggota_pemda[k])),
+        "isu_representatif": {
+            "pemda": isu_rep["pemda_name"],
+            "kodepemda": isu_rep["kodepemda"],
+            "isu": isu_rep["issue_original_text"],
+            "skor_ke_centroid": float(skor_unik[representatif_unik[k]])
+        },
+        "tema_dominan": [
+            {"tema": korpus.themes_list[korpus.tema_ids[t]], "jumlah_isu": int(anggota_tema[k, t])}
+            for t in tema_urut.tolist() if anggota_tema[k, t] > 0
+        ],
+        "pemda": [korpus.nama_region[d] for d in np.flatnonzero(anggota_pemda[k]).tolist()]
+    })
+ringkasan.sort(key=lambda r: -r["jumlah_isu"])
+
+# SIMPAN HASIL
+try:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    np.save(os.path.join(OUTPUT_DIR, "centroid.npy"), centroid)
+    with open(os.path.join(OUTPUT_DIR, "klaster.json"), 'w', encoding='utf-8') as f:
+        json.dump(ringkasan, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(OUTPUT_DIR, "klaster_pemda.csv"), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["klaster"] + list(korpus.nama_region))
+        for k, baris in enumerate(anggota_pemda.tolist()):
+            writer.writerow([k] + baris)
+    logging.info(f"📂 {len(ringkasan)} klaster tersimpan di {OUTPUT_DIR} (centroid.npy, klaster.json, klaster_pemda.csv)")
+except Exception as e:
+    logging.error(f"Gagal menyimpan hasil klaster: {e}")
+
+# Lepas alias memmap dulu (blok = view ke memmap), biar file memmap sementaranya bisa dihapus (penting di Windows)
+del emb_norm, blok
+korpus.lepas_embedding()
@@ -0,0 +1,60 @@
+import numpy as np
+
+N_ITER_KMEANS = 10
+
+
+def kmeans_sferis(emb_norm, n_klaster, n_iter=N_ITER_KMEANS, seed=0, block_size=4096):
+    """K-means di permukaan bola (embedding sudah L2-normalisasi, jarak = 1 - cosine)"""
+    rng = np.random.default_rng(seed)
+    n_klaster = max(1, min(n_klaster, len(emb_norm)))
+    centroid = emb_norm[rng.choice(len(emb_norm), n_klaster, replace=False)].copy()
+
+    for _ in range(n_iter):
+        label = tetapkan_klaster(emb_norm, centroid, block_size)
+        jumlah = np.zeros_like(centroid)
+        np.add.at(jumlah, label, emb_norm)
+        norm = np.linalg.norm(jumlah, axis=1, keepdims=True)
+        kosong = norm[:, 0] == 0
+        # Klaster kosong diisi ulang titik acak biar jumlah list tetap
+        jumlah[kosong] = emb_norm[rng.choice(len(emb_norm), int(kosong.sum()))]
+        norm[kosong] = 1.0
+        centroid = (jumlah / norm).astype(np.float32)
+    return centroid
+
+
+def kmeans_minibatch_sferis(emb_norm, n_klaster, batch_size=1024, n_iter=100, seed=0):
+    """
+    Mini-batch k-means sferis (Sculley 2010): tiap iterasi cuma baca batch_size baris acak,
+    centroid digeser dgn learning rate 1/jumlah_anggota (per batch, tervektorisasi) lalu dinormalisasi ulang.
+    Memori terbatas (emb_norm boleh memmap), gak perlu semua data sekaligus.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(emb_norm)
+    n_klaster = max(1, min(n_klaster, n))
+    centroid = np.asarray(emb_norm[np.sort(rng.choice(n, n_klaster, replace=False))], dtype=np.float32).copy()
+    jumlah_anggota = np.zeros(n_klaster, dtype=np.int64)
+
+    for _ in range(n_iter):
+        # Indeks diurutkan biar baca memmap-nya lebih sekuensial
+        batch = np.asarray(emb_norm[np.sort(rng.choice(n, min(batch_size, n), replace=False))], dtype=np.float32)
+        label = np.argmax(batch @ centroid.T, axis=1)
+        # Rata-rata berjalan per centroid (sama dgn update satu-satu pakai eta = 1/jumlah_anggota)
+        jumlah_batch = np.bincount(label, minlength=n_klaster)
+        total_batch = np.zeros_like(centroid)
+        np.add.at(total_batch, label, batch)
+        jumlah_baru = jumlah_anggota + jumlah_batch
+        ada = jumlah_batch > 0
+        centroid[ada] = (
+            jumlah_anggota[ada, None] * centroid[ada] + total_batch[ada]
+        ) / jumlah_baru[ada, None]
+        jumlah_anggota = jumlah_baru
+        centroid /= np.maximum(np.linalg.norm(centroid, axis=1, keepdims=True), 1e-12)
+    return centroid
+
+
+def tetapkan_klaster(emb_norm, centroid, block_size=4096):
+    """Indeks centroid terdekat untuk tiap baris (dihitung per blok)"""
+    label = np.empty(len(emb_norm), dtype=np.int64)
+    for start in range(0, len(emb_norm), block_size):
+        label[start:start + block_size] = np.argmax(emb_norm[start:start + block_size] @ centroid.T, axis=1)
+    return label
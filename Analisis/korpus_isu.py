@@ -0,0 +1,425 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+
+import numpy as np
+
+from cache_embedding import CACHE_DIR, dedup_teks, simpan_mmap
+from indeks_ann import N_PROBE, kandidat_ann
+from kemiripan_blok import (
+    BLOCK_SIZE, MARGIN_KOMPAK, agregasi_daerah, kandidat_edge, kode_daerah,
+    kompres_embedding, normalisasi
+)
+from matriks_tema import matriks_tema_dengan_cache
+from pencocok_keyword import PencocokKeyword
+
+MODEL_NAME = 'intfloat/multilingual-e5-large'
+RELEVANCE_THRESHOLD = 0.5
+
+
+def bersihkan_isu(issue_text):
+    """Buang penomoran di depan isu ("1. ...")"""
+    return re.sub(r'^\d+\.\s*', '', issue_text).strip()
+
+
+def sidik_per_pemda(data):
+    """Sidik sha256 daftar isu tiap pemda (per nama), buat deteksi pemda yg berubah antar run"""
+    isu_pemda = {}
+    for item in data['data']:
+        isu_pemda.setdefault(item['namapemda'], []).append([item['kodepemda'], item['data']])
+    return {
+        nama: hashlib.sha256(json.dumps(isi, ensure_ascii=False).encode("utf-8")).hexdigest()
+        for nama, isi in isu_pemda.items()
+    }
+
+
+def pemda_berubah(sidik_lama, sidik_baru):
+    """Nama pemda yg isunya berubah, baru ditambahkan, atau dihapus"""
+    return {
+        nama for nama in set(sidik_lama) | set(sidik_baru)
+        if sidik_lama.get(nama) != sidik_baru.get(nama)
+    }
+
+
+def saring_kandidat(kandidat_isu, threshold):
+    """
+    Kandidat dgn skor >= threshold. Pemenang per daerah sudah urut skor tertinggi dulu,
+    jadi cukup ambil prefix-nya (gak perlu hitung ulang similaritas).
+    """
+    hasil = {}
+    for i, (pemenang_j, pemenang_skor) in kandidat_isu.items():
+        n = int(np.count_nonzero(pemenang_skor >= threshold))
+        if n:
+            hasil[i] = (pemenang_j[:n], pemenang_skor[:n])
+    return hasil
+
+
+def ringkas_hasil(hasil_analisis):
+    """Statistik ringkas hasil: jumlah isu & pasangan total, per daerah asal, dan per tema"""
+    ringkasan = {"jumlah_isu": 0, "jumlah_pasangan": 0, "per_daerah": {}, "per_tema": {}}
+    for record in hasil_analisis:
+        n_pasangan = len(record['peringkat_kemiripan'])
+        ringkasan["jumlah_isu"] += 1
+        ringkasan["jumlah_pasangan"] += n_pasangan
+        for kunci, nama in (("per_daerah", record['daerah_asal']), ("per_tema", record['tema_nama'])):
+            stat = ringkasan[kunci].setdefault(nama, {"jumlah_isu": 0, "jumlah_pasangan": 0})
+            stat["jumlah_isu"] += 1
+            stat["jumlah_pasangan"] += n_pasangan
+    return ringkasan
+
+
+class KorpusIsu:
+    """
+    Semua isu pemda + kamus tema yg sudah disiapkan sekali (tema, matriks isu x tema, embedding),
+    dipakai bareng oleh analisis_isu.py (sekali jalan) dan layanan_isu.py (daemon).
+    """
+
+    def __init__(self, data, kamus_raw, batas_kata=False):
+        # Ubah format jadi dict {id: {"nama":..., "keywords":...}}
+        self.common_themes = {
+            tema["id"]: {
+                "nama": tema["nama"],
+                "keywords": tema["keywords"]
+            }
+            for tema in kamus_raw["klasifikasi_topik"]
+        }
+
+        # Mapping id -> nama
+        self.themes_list = {
+            tema_id: tema_data["nama"]
+            for tema_id, tema_data in self.common_themes.items()
+        }
+
+        # Automaton keyword dibangun sekali dari kamus (urutan tema = urutan common_themes)
+        self.tema_ids = list(self.common_themes.keys())
+        keywords_per_tema = [self.common_themes[tema_id]["keywords"] for tema_id in self.tema_ids]
+        self.pencocok_tema = PencocokKeyword(keywords_per_tema, batas_kata=batas_kata)
+
+        # PERSIAPAN DATA ISU
+        self.all_individual_issues = []
+        for item in data['data']:
+            kodepemda = item['kodepemda']
+            pemda_name = item['namapemda']
+            for issue_text in item['data']:
+                if issue_text and issue_text.strip():
+                    self.all_individual_issues.append({
+                        "pemda_name": pemda_name,
+                        "kodepemda": kodepemda,
+                        "issue_original_text": issue_text,
+                        "issue_clean_text": bersihkan_isu(issue_text)
+                    })
+
+        self.kota_acuan_pembanding = sorted(list(set(item['pemda_name'] for item in self.all_individual_issues)))
+
+        self.isu_per_daerah = {}
+        for i, item in enumerate(self.all_individual_issues):
+            self.isu_per_daerah.setdefault(item['pemda_name'], []).append(i)
+
+        # Deteksi tema sekali aja: matriks isu x tema (kolom = urutan common_themes)
+        self.matriks_tema = matriks_tema_dengan_cache(
+            [item['issue_clean_text'] for item in self.all_individual_issues],
+            keywords_per_tema,
+            batas_kata=batas_kata
+        )
+
+        # Banyak pemda punya isu yg teksnya persis sama, cukup di-encode sekali
+        self.teks_unik, self.inverse_isu = dedup_teks(
+            [item['issue_clean_text'] for item in self.all_individual_issues]
+        )
+        self.kode_region, self.nama_region = kode_daerah([item['pemda_name'] for item in self.all_individual_issues])
+        self.embedding_norm = None
+        self.embedding_kompak = None
+        self.penyimpanan = "float32"
+        self.path_mmap = None
+        # File memmap yg dibuat sendiri oleh pasang_embedding (dihapus lagi di lepas_embedding)
+        self._path_mmap_sementara = None
+
+        # Himpunan tema tiap isu sebagai bitmask int (bit t = kolom tema t), dihitung sekali dari matriks tema
+        self.mask_isu = [0] * self.matriks_tema.n_isu
+        for i in range(self.matriks_tema.n_isu):
+            for t in self.matriks_tema.tema_isu(i).tolist():
+                self.mask_isu[i] |= 1 << t
+        # Teks penjelasan per bitmask tema bersama (jumlah kombinasi tema jauh lebih kecil dari jumlah pasangan)
+        self._penjelasan_mask = {}
+
+    def cari_tema_id(self, nama_tema):
+        """Id tema dari namanya (tidak case sensitive), None kalau gak ada"""
+        return next(
+            (tid for tid, tnama in self.themes_list.items() if tnama.lower() == nama_tema.lower()),
+            None
+        )
+
+    def pasang_embedding(self, embedding_unik, penyimpanan="float32", folder_mmap=CACHE_DIR, pakai_mmap=False):
+        """
+        Simpan embedding teks unik (urutan = self.teks_unik) dalam bentuk ter-normalisasi.
+        penyimpanan float16/int8: yg tinggal di RAM cuma bentuk ringkas, versi float32 ditaruh
+        di file memmap & cuma dibaca untuk skor ulang kandidat yg lolos pass kasar.
+        pakai_mmap: float32 juga lewat file memmap (dipakai bareng worker --jobs).
+        File memmap-nya sementara (nama unik per korpus), panggil lepas_embedding di akhir run buat menghapusnya.
+        """
+        self.lepas_embedding()
+        emb_norm = normalisasi(embedding_unik)
+        if penyimpanan == "float32" and not pakai_mmap:
+            self.penyimpanan = penyimpanan
+            self.embedding_norm = emb_norm
+            self.embedding_kompak = None
+            return
+
+        path_mmap = os.path.join(folder_mmap, f"norm_{uuid.uuid4().hex[:16]}.npy")
+        simpan_mmap(emb_norm, path_mmap)
+        del emb_norm
+        self._path_mmap_sementara = path_mmap
+        self.pasang_embedding_mmap(path_mmap, penyimpanan)
+
+    def lepas_embedding(self):
+        """Lepas embedding & hapus file memmap sementara dari pasang_embedding (kalau ada)"""
+        path_mmap, self._path_mmap_sementara = self._path_mmap_sementara, None
+        self.embedding_norm = None
+        self.embedding_kompak = None
+        self.path_mmap = None
+        if path_mmap is None:
+            return
+        try:
+            os.remove(path_mmap)
+        except OSError as e:
+            logging.warning(f"⚠️ File memmap embedding {path_mmap} gagal dihapus: {e}")
+
+    def pasang_embedding_mmap(self, path_mmap, penyimpanan="float32"):
+        """Pakai embedding ter-normalisasi dari file .npy (memmap read-only), plus bentuk ringkas kalau diminta"""
+        self.penyimpanan = penyimpanan
+        self.path_mmap = path_mmap
+        self.embedding_norm = np.load(path_mmap, mmap_mode="r")
+        self.embedding_kompak = None
+        if penyimpanan == "float32":
+            return
+
+        self.embedding_kompak = kompres_embedding(self.embedding_norm, penyimpanan)
+        data, skala = self.embedding_kompak
+        byte_kompak = data.nbytes + (skala.nbytes if skala is not None else 0)
+        logging.info(
+            f"🗜️ Embedding {penyimpanan}: {byte_kompak / 1024:.1f} KB di RAM "
+            f"(float32: {self.embedding_norm.nbytes / 1024:.1f} KB, di memmap)"
+        )
+
+    def penjelasan_mask(self, mask):
+        """Teks penjelasan untuk bitmask tema yg sama-sama ada di kedua isu (di-cache per mask)"""
+        penjelasan = self._penjelasan_mask.get(mask)
+        if penjelasan is None:
+            found_themes_in_both = set()
+            sisa, t = mask, 0
+            while sisa:
+                if sisa & 1:
+                    found_themes_in_both.add(self.common_themes[self.tema_ids[t]]["nama"])
+                sisa >>= 1
+                t += 1
+
+            if found_themes_in_both:
+                penjelasan = "Fokus tema umum yang terdeteksi: " + ", ".join(sorted(found_themes_in_both)) + "."
+            else:
+                penjelasan = "Kecocokan berdasarkan makna kalimat secara umum."
+            self._penjelasan_mask[mask] = penjelasan
+        return penjelasan
+
+    def penjelasan_pasangan(self, i, j):
+        """Penjelasan similarity dua isu korpus berdasarkan keyword sama: cukup AND bitmask tema yg sudah dihitung"""
+        return self.penjelasan_mask(self.mask_isu[i] & self.mask_isu[j])
+
+    def hitung_kandidat(self, daerah_terpilih, threshold=RELEVANCE_THRESHOLD, block_size=BLOCK_SIZE,
+                        indeks_ann=None, n_probe=N_PROBE):
+        """
+        Kandidat terbaik per daerah pembanding untuk semua isu milik daerah_terpilih.
+        Kalau indeks_ann diisi, kandidat diambil dari index ANN lalu di-rerank exact.
+        """
+        set_daerah_terpilih = set(daerah_terpilih)
+        indeks_query = [
+            i for i, item in enumerate(self.all_individual_issues)
+            if item['pemda_name'] in set_daerah_terpilih
+        ]
+
+        if indeks_ann is not None:
+            kandidat_isu, n_pasangan = kandidat_ann(
+                indeks_ann, self.embedding_norm, indeks_query, self.kode_region, threshold,
+                self.inverse_isu, n_probe, block_size
+            )
+            logging.info(f"   - {n_pasangan} pasangan isu (ANN, n_probe={n_probe}) lolos threshold")
+            return kandidat_isu
+
+        # Cosine similarity simetris: tiap pasangan isu beda daerah dihitung sekali,
+        # arah A -> B dan B -> A diturunkan dari edge yg sama & langsung direduksi per blok
+        kandidat_isu, n_pasangan = kandidat_edge(
+            self.embedding_norm, indeks_query, self.kode_region, threshold, block_size, self.inverse_isu,
+            self.embedding_kompak, MARGIN_KOMPAK.get(self.penyimpanan, 0.0)
+        )
+        logging.info(f"   - {n_pasangan} pasangan isu lolos threshold")
+        return kandidat_isu
+
+    def hitung_kandidat_berubah(self, daerah_berubah, threshold=RELEVANCE_THRESHOLD, block_size=BLOCK_SIZE):
+        """
+        Versi inkremental hitung_kandidat: cuma baris & kolom milik daerah_berubah yg dihitung.
+        Hasil dict {i: (array j, array skor)} untuk SEMUA arah: isu daerah berubah dapat kandidat lengkap,
+        isu daerah lain cuma dapat kandidat dari daerah berubah (buat di-patch ke hasil lama).
+        """
+        set_daerah_berubah = set(daerah_berubah)
+        indeks_query = [
+            i for i, item in enumerate(self.all_individual_issues)
+            if item['pemda_name'] in set_daerah_berubah
+        ]
+        kandidat_isu, n_pasangan = kandidat_edge(
+            self.embedding_norm, indeks_query, self.kode_region, threshold, block_size, self.inverse_isu,
+            self.embedding_kompak, MARGIN_KOMPAK.get(self.penyimpanan, 0.0),
+            query_arah=np.arange(len(self.all_individual_issues))
+        )
+        logging.info(f"   - {n_pasangan} pasangan isu (yg menyentuh daerah berubah) lolos threshold")
+        return kandidat_isu
+
+    def matriks_daerah(self, kandidat_isu):
+        """(jumlah, rata2) pemda x pemda, baris/kolom urut self.nama_region; baris cuma terisi untuk daerah query"""
+        return agregasi_daerah(kandidat_isu, self.kode_region, len(self.nama_region))
+
+    def _isu_per_tema(self, daerah, tema_filter_id=None):
+        """Yield (tema_id, tema_nama, [(i, data_isu), ...]) untuk tema yg punya isu di daerah ini"""
+        for tema_idx, (tema_id, tema_nama) in enumerate(self.themes_list.items()):
+            if tema_filter_id and tema_id != tema_filter_id:
+                continue  # skip kalau bukan tema yang diminta
+
+            mask_tema = self.matriks_tema.mask_tema(tema_idx)
+            isu_tersaring = [
+                (i, self.all_individual_issues[i])
+                for i in self.isu_per_daerah.get(daerah, [])
+                if mask_tema[i]
+            ]
+            if isu_tersaring:
+                yield tema_id, tema_nama, isu_tersaring
+
+    def _peringkat(self, i, pemenang_j, pemenang_skor):
+        peringkat_kemiripan = []
+        for j, skor in zip(pemenang_j.tolist(), pemenang_skor.tolist()):
+            isu_pembanding = self.all_individual_issues[j]
+            peringkat_kemiripan.append({
+                'pemda_pembanding': isu_pembanding['pemda_name'],
+                'kodepemda_pembanding': isu_pembanding['kodepemda'],
+                'isu_pembanding': isu_pembanding['issue_original_text'],
+                'skor': skor,
+                'analisis_tema': self.penjelasan_pasangan(i, j)
+            })
+        return peringkat_kemiripan
+
+    @staticmethod
+    def _record(daerah, tema_id, tema_nama, isu_terpilih_data, peringkat_kemiripan):
+        return {
+            'daerah_asal': daerah,
+            'kodepemda_asal': isu_terpilih_data['kodepemda'],
+            'tema_id': tema_id,
+            'tema_nama': tema_nama,
+            'isu_asal': isu_terpilih_data['issue_original_text'],
+            'peringkat_kemiripan': peringkat_kemiripan
+        }
+
+    def iter_hasil(self, daerah_terpilih, kandidat_isu, tema_filter_id=None):
+        """Yield record hasil.json per (daerah, tema, isu) yg punya pasangan di daerah lain"""
+        for daerah_idx, daerah in enumerate(daerah_terpilih, start=1):
+            logging.info(f"[{daerah_idx}/{len(daerah_terpilih)}] 📍 Memproses daerah: {daerah}")
+
+            for tema_id, tema_nama, isu_tersaring in self._isu_per_tema(daerah, tema_filter_id):
+                logging.info(f"   - Tema '{tema_nama}': {len(isu_tersaring)} isu ditemukan")
+
+                for indeks_isu_terpilih, isu_terpilih_data in isu_tersaring:
+                    if indeks_isu_terpilih not in kandidat_isu:
+                        continue  # gak ada isu daerah lain yg lolos threshold
+
+                    # Pemenang per daerah pembanding sudah direduksi & diurutkan di kandidat_edge
+                    pemenang_j, pemenang_skor = kandidat_isu[indeks_isu_terpilih]
+                    yield self._record(
+                        daerah, tema_id, tema_nama, isu_terpilih_data,
+                        self._peringkat(indeks_isu_terpilih, pemenang_j, pemenang_skor)
+                    )
+
+    def iter_hasil_patch(self, hasil_lama, daerah_berubah, kandidat_berubah, tema_filter_id=None):
+        """
+        Yield record hasil.json lengkap (semua daerah) dengan menambal hasil_lama:
+        daerah berubah dihitung ulang penuh, daerah lain cuma entri pembanding dari daerah berubah yg diganti.
+        """
+        set_daerah_berubah = set(daerah_berubah)
+        record_lama = {}
+        for record in hasil_lama:
+            if record['daerah_asal'] not in set_daerah_berubah:
+                kunci = (record['daerah_asal'], record['tema_id'], record['isu_asal'])
+                record_lama.setdefault(kunci, []).append(record)
+
+        # Isu pembanding lama -> indeks isu sekarang (daerahnya gak berubah, jadi indeksnya masih valid),
+        # dipakai buat urutan tie-break yg sama dengan run penuh
+        indeks_isu = {}
+        for i, item in enumerate(self.all_individual_issues):
+            indeks_isu.setdefault((item['pemda_name'], item['issue_original_text']), i)
+
+        for daerah in self.kota_acuan_pembanding:
+            if daerah in set_daerah_berubah:
+                logging.info(f"🔁 Menghitung ulang daerah: {daerah}")
+                for tema_id, tema_nama, isu_tersaring in self._isu_per_tema(daerah, tema_filter_id):
+                    for i, isu_terpilih_data in isu_tersaring:
+                        if i in kandidat_berubah:
+                            yield self._record(
+                                daerah, tema_id, tema_nama, isu_terpilih_data, self._peringkat(i, *kandidat_berubah[i])
+                            )
+                continue
+
+            for tema_id, tema_nama, isu_tersaring in self._isu_per_tema(daerah, tema_filter_id):
+                for i, isu_terpilih_data in isu_tersaring:
+                    lama = record_lama.get((daerah, tema_id, isu_terpilih_data['issue_original_text']))
+                    peringkat = []
+                    if lama:
+                        peringkat = [
+                            p for p in lama.pop(0)['peringkat_kemiripan']
+                            if p['pemda_pembanding'] not in set_daerah_berubah
+                        ]
+                    if i in kandidat_berubah:
+                        peringkat += self._peringkat(i, *kandidat_berubah[i])
+                    if not peringkat:
+                        continue
+
+                    peringkat.sort(key=lambda p: (
+                        -p['skor'], indeks_isu.get((p['pemda_pembanding'], p['isu_pembanding']), -1)
+                    ))
+                    yield self._record(daerah, tema_id, tema_nama, isu_terpilih_data, peringkat)
+
+    def analisis(self, daerah_terpilih, tema_filter_id=None, threshold=RELEVANCE_THRESHOLD, block_size=BLOCK_SIZE,
+                 indeks_ann=None, n_probe=N_PROBE):
+        """Hitung kandidat + susun semua record hasil untuk daerah_terpilih"""
+        kandidat_isu = self.hitung_kandidat(daerah_terpilih, threshold, block_size, indeks_ann, n_probe)
+        return list(self.iter_hasil(daerah_terpilih, kandidat_isu, tema_filter_id))
+
+    def nama_tema_isu(self, i):
+        """Nama tema (dari kamus) yg cocok dengan isu ke-i"""
+        return [self.themes_list[self.tema_ids[t]] for t in self.matriks_tema.tema_isu(i).tolist()]
+
+    def cari_per_pemda(self, embedding_query, k=10):
+        """Top-k isu paling mirip dikelompokkan per pemda (urut skor terbaik pemda), lengkap dengan tag tema"""
+        per_pemda = {}
+        for i, skor in self.cari_mirip(embedding_query, k):
+            isu = self.all_individual_issues[i]
+            kelompok = per_pemda.setdefault(isu['pemda_name'], {
+                "pemda": isu['pemda_name'],
+                "kodepemda": isu['kodepemda'],
+                "skor_terbaik": skor,
+                "isu": []
+            })
+            kelompok["isu"].append({
+                "isu": isu['issue_original_text'],
+                "skor": skor,
+                "tema": self.nama_tema_isu(i)
+            })
+        return list(per_pemda.values())
+
+    def cari_mirip(self, embedding_query, k=10):
+        """Top-k isu (indeks, skor) paling mirip dengan satu embedding query"""
+        skor_unik = self.embedding_norm @ normalisasi(np.atleast_2d(embedding_query))[0]
+        skor_isu = skor_unik[self.inverse_isu]
+        k = min(k, len(skor_isu))
+        if k <= 0:
+            return []
+        top = np.argpartition(-skor_isu, k - 1)[:k]
+        top = top[np.argsort(-skor_isu[top], kind="stable")]
+        return [(int(i), float(skor_isu[i])) for i in top]
@@ -0,0 +1,70 @@
+import json
+import logging
+import sys
+import os
+import time
+from pathlib import Path
+from data_pemda import DATA_PATH, muat_data_pemda, semua_isu, tabel_pemda
+
+# --- SETUP LOGGING ---
+os.makedirs("Output", exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("Output/proses.log", encoding="utf-8"),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+output_dir = Path("Output")
+
+
+def catat_waktu(nama, mulai):
+    durasi = time.perf_counter() - mulai
+    logging.info(f"⏱️ {nama}: {durasi:.2f} dtk")
+    return durasi
+
+
+# Import pandas/matplotlib sekali untuk semua laporan
+mulai = time.perf_counter()
+from ekstrak_tabel import buat_tabel_pemda
+from distribusi_isu import buat_distribusi_isu
+from isu_distribusi import buat_distribusi_tema
+catat_waktu("Import pandas/matplotlib", mulai)
+
+# Load & normalisasi data sekali, dipakai bareng semua laporan
+mulai = time.perf_counter()
+try:
+    data = muat_data_pemda(DATA_PATH)
+    logging.info(f"✅ File {DATA_PATH} berhasil dimuat.")
+except FileNotFoundError:
+    logging.error(f"❌ File {DATA_PATH} tidak ditemukan.")
+    sys.exit()
+except json.JSONDecodeError:
+    logging.error(f"❌ File {DATA_PATH} bukan JSON yang valid.")
+    sys.exit()
+tabel = tabel_pemda(data)
+all_issues = semua_isu(tabel)
+catat_waktu("Load & normalisasi data", mulai)
+
+# Distribusi tema ditulis ke distribusi_tema.html biar gak menimpa distribusi_isu.html (distribusi per isu)
+laporan = [
+    ("Tabel pemda", lambda: buat_tabel_pemda(tabel, output_dir / "tabel_pemda.html")),
+    ("Distribusi isu", lambda: buat_distribusi_isu(all_issues, output_dir / "distribusi_isu.html")),
+    ("Distribusi tema", lambda: buat_distribusi_tema(
+        all_issues, output_dir / "distribusi_tema.html", output_dir / "distribusi_isu.xlsx", output_dir / "cache_tema"
+    )),
+]
+
+waktu = {}
+for nama, buat in laporan:
+    mulai = time.perf_counter()
+    try:
+        buat()
+    except Exception as e:
+        logging.error(f"❌ Gagal membuat laporan {nama}: {e}")
+        continue
+    waktu[nama] = catat_waktu(nama, mulai)
+
+logging.info(f"🎉 {len(waktu)}/{len(laporan)} laporan selesai dalam {sum(waktu.values()):.2f} dtk.")
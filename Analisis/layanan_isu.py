@@ -0,0 +1,145 @@
+import json
+import sys
+import time
+import logging
+import argparse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+from cache_embedding import CACHE_DIR, encode_dengan_cache
+from encoder_isu import BACKENDS, PREFIX_QUERY, muat_encoder
+from kemiripan_blok import BLOCK_SIZE
+from korpus_isu import RELEVANCE_THRESHOLD, KorpusIsu, bersihkan_isu
+
+# --- SETUP LOGGING ---
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("./Output/proses.log", encoding="utf-8"),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+# PARSE ARGUMEN
+parser = argparse.ArgumentParser(description="Layanan HTTP lokal: model & index isu tetap di memori")
+parser.add_argument("--host", type=str, default="127.0.0.1", help="Alamat bind (default cuma localhost)")
+parser.add_argument("--port", type=int, default=8765, help="Port HTTP")
+parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="Folder cache embedding isu")
+parser.add_argument("--batas-kata", action="store_true", help="Keyword tema harus cocok sebagai kata utuh, bukan substring")
+parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="Jumlah isu per blok perhitungan similaritas")
+parser.add_argument("--encoder", choices=BACKENDS, default="fp32", help="Backend encoder: fp32 (baseline), onnx-int8, kecil (e5-small)")
+args = parser.parse_args()
+
+
+# LOAD DATA PEMDA & KAMUS TEMA
+try:
+    with open('./Data/data_pemda.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with open('./Data/kamus_tema.json', 'r', encoding='utf-8') as f:
+        kamus_raw = json.load(f)
+    logging.info("File data_pemda.json & kamus_tema.json berhasil dimuat.")
+except FileNotFoundError as e:
+    logging.error(f"File data tidak ditemukan: {e.filename}")
+    sys.exit()
+
+korpus = KorpusIsu(data, kamus_raw, batas_kata=args.batas_kata)
+
+# LOAD MODEL SEMANTIK (sekali aja, lalu dipakai semua request)
+logging.info(f"📦 Memuat model semantik (backend {args.encoder})...")
+try:
+    encode_isu, nama_cache = muat_encoder(args.encoder, show_progress_bar=False)
+    logging.info("✅ Model berhasil dimuat.")
+except Exception as e:
+    logging.critical(f"Gagal memuat model: {e}")
+    sys.exit()
+
+korpus.pasang_embedding(encode_dengan_cache(korpus.teks_unik, nama_cache, encode_isu, args.cache_dir))
+logging.info(f"✅ Index siap: {len(korpus.all_individual_issues)} isu, {len(korpus.kota_acuan_pembanding)} daerah.")
+
+
+class HandlerIsu(BaseHTTPRequestHandler):
+    """
+    GET /status
+    GET /analisis?daerah=<nama>&tema=<nama>   -> record format hasil.json
+    GET /mirip?teks=<isu>&k=10                -> isu paling mirip dari semua pemda
+    """
+
+    def _kirim_json(self, status, isi):
+        body = json.dumps(isi, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        mulai = time.perf_counter()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/status":
+            status, isi = 200, {
+                "model": nama_cache,
+                "jumlah_isu": len(korpus.all_individual_issues),
+                "jumlah_daerah": len(korpus.kota_acuan_pembanding)
+            }
+        elif url.path == "/analisis":
+            status, isi = self._analisis(query)
+        elif url.path == "/mirip":
+            status, isi = self._mirip(query)
+        else:
+            status, isi = 404, {"error": f"Endpoint '{url.path}' tidak dikenal."}
+
+        self._kirim_json(status, isi)
+        logging.info(f"🌐 {url.path} -> {status} ({(time.perf_counter() - mulai) * 1000:.1f} ms)")
+
+    def _analisis(self, query):
+        daerah_terpilih = korpus.kota_acuan_pembanding
+        if query.get("daerah"):
+            if query["daerah"] not in korpus.isu_per_daerah:
+                return 404, {"error": f"Daerah '{query['daerah']}' tidak ditemukan dalam data."}
+            daerah_terpilih = [query["daerah"]]
+
+        tema_filter_id = None
+        if query.get("tema"):
+            tema_filter_id = korpus.cari_tema_id(query["tema"])
+            if tema_filter_id is None:
+                return 404, {"error": f"Tema '{query['tema']}' tidak ditemukan dalam kamus tema."}
+
+        return 200, korpus.analisis(daerah_terpilih, tema_filter_id, RELEVANCE_THRESHOLD, args.block_size)
+
+    def _mirip(self, query):
+        teks = bersihkan_isu(query.get("teks", ""))
+        if not teks:
+            return 400, {"error": "Parameter 'teks' wajib diisi."}
+        try:
+            k = int(query.get("k", 10))
+        except ValueError:
+            return 400, {"error": "Parameter 'k' harus angka."}
+
+        hasil = []
+        # Prefix query sama dengan cari_isu.py, biar peringkat kedua entry point konsisten
+        for i, skor in korpus.cari_mirip(encode_isu([PREFIX_QUERY + teks])[0], k):
+            isu = korpus.all_individual_issues[i]
+            hasil.append({
+                "pemda": isu["pemda_name"],
+                "kodepemda": isu["kodepemda"],
+                "isu": isu["issue_original_text"],
+                "skor": skor
+            })
+        return 200, hasil
+
+    def log_message(self, format, *log_args):
+        # Log akses udah ditangani di do_GET
+        pass
+
+
+server = HTTPServer((args.host, args.port), HandlerIsu)
+logging.info(f"🚀 Layanan isu jalan di http://{args.host}:{args.port} (Ctrl+C untuk berhenti)")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    logging.info("🛑 Layanan dihentikan.")
+finally:
+    server.server_close()
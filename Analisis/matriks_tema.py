@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from pencocok_keyword import PencocokKeyword
+
+# Folder cache matriks isu x tema
+CACHE_DIR = "./Output/cache_tema"
+
+# Jumlah file cache matriks tema yg disimpan, yg paling lama gak dipakai dibuang duluan.
+# Gak cuma 1: beberapa script (korpus isu, penyebaran, distribusi tema) berbagi folder dgn teks berbeda
+MAKS_CACHE_TEMA = 8
+
+
+class MatriksTema:
+    """Matriks boolean sparse isu x tema (format CSR: indptr + indices)"""
+
+    def __init__(self, indptr, indices, n_tema):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.n_tema = int(n_tema)
+        self._kolom = {}
+
+    @property
+    def n_isu(self):
+        return len(self.indptr) - 1
+
+    def tema_isu(self, i):
+        """Indeks kolom tema yg cocok dengan isu ke-i"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def mask_tema(self, t):
+        """Array boolean (n_isu,) isu mana aja yg masuk tema ke-t (di-cache per kolom)"""
+        if t not in self._kolom:
+            baris = np.repeat(np.arange(self.n_isu), np.diff(self.indptr))
+            mask = np.zeros(self.n_isu, dtype=bool)
+            mask[baris[self.indices == t]] = True
+            self._kolom[t] = mask
+        return self._kolom[t]
+
+    def tema_pertama(self):
+        """Kolom tema pertama yg cocok per isu, -1 kalau gak ada yg cocok"""
+        hasil = np.full(self.n_isu, -1, dtype=np.int64)
+        ada = np.diff(self.indptr) > 0
+        hasil[ada] = self.indices[self.indptr[:-1][ada]]
+        return hasil
+
+
+def bangun_matriks_tema(texts, keywords_per_tema, batas_kata=False):
+    """
+    Cocokkan keyword (tidak case sensitive) ke tiap teks sekali jalan pakai automaton Aho-Corasick.
+    keywords_per_tema: list berisi list keyword, urutannya = urutan kolom tema.
+    """
+    pencocok = PencocokKeyword(keywords_per_tema, batas_kata=batas_kata)
+    indptr = [0]
+    indices = []
+    for text in texts:
+        indices.extend(sorted(pencocok.tema_cocok(text)))
+        indptr.append(len(indices))
+    return MatriksTema(indptr, indices, len(keywords_per_tema))
+
+
+def matriks_tema_dengan_cache(texts, keywords_per_tema, cache_dir=CACHE_DIR, batas_kata=False):
+    """Sama kayak bangun_matriks_tema, tapi hasilnya disimpan ke .npz (kunci: hash kamus + teks + mode)"""
+    kunci = hashlib.sha256(
+        json.dumps([keywords_per_tema, list(texts), batas_kata], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    path = os.path.join(cache_dir, f"matriks_tema_{kunci[:24]}.npz")
+
+    if os.path.exists(path):
+        try:
+            with np.load(path) as f:
+                matriks = MatriksTema(f["indptr"], f["indices"], int(f["n_tema"]))
+            logging.info(f"💾 Matriks isu x tema dimuat dari cache: {path}")
+            try:
+                os.utime(path)  # tandai baru dipakai, biar gak ikut dipangkas
+            except OSError:
+                pass
+            return matriks
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"⚠️ Cache matriks tema tidak bisa dibaca, dibuat ulang: {e}")
+
+    matriks = bangun_matriks_tema(texts, keywords_per_tema, batas_kata)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez_compressed(path, indptr=matriks.indptr, indices=matriks.indices, n_tema=matriks.n_tema)
+        logging.info(f"💾 Matriks isu x tema disimpan di {path}")
+        pangkas_cache_tema(cache_dir)
+    except OSError as e:
+        logging.warning(f"⚠️ Gagal menyimpan cache matriks tema: {e}")
+    return matriks
+
+
+def pangkas_cache_tema(cache_dir=CACHE_DIR, maks_file=MAKS_CACHE_TEMA):
+    """Hapus file matriks_tema_*.npz selain maks_file yg paling baru dipakai (mtime), biar folder cache gak tumbuh terus"""
+    daftar = []
+    for nama in os.listdir(cache_dir):
+        if nama.startswith("matriks_tema_") and nama.endswith(".npz"):
+            path = os.path.join(cache_dir, nama)
+            try:
+                daftar.append((os.path.getmtime(path), path))
+            except OSError:
+                pass  # barusan dihapus proses lain
+    daftar.sort(reverse=True)
+    for _, path in daftar[maks_file:]:
+        try:
+            os.remove(path)
+            logging.info(f"🧹 Cache matriks tema lama dihapus: {path}")
+        except OSError:
+            pass
@@ -0,0 +1,81 @@
+import logging
+import multiprocessing
+import os
+import time
+
+from kemiripan_blok import BLOCK_SIZE
+from korpus_isu import KorpusIsu
+
+# Korpus milik proses worker (diisi _init_worker, sekali per proses)
+_korpus_worker = None
+_opsi_worker = None
+
+
+def _init_worker(data, kamus_raw, batas_kata, path_mmap, penyimpanan, opsi):
+    global _korpus_worker, _opsi_worker
+    # Matriks tema diambil dari cache, embedding dibaca read-only dari memmap yg sama dgn parent
+    _korpus_worker = KorpusIsu(data, kamus_raw, batas_kata=batas_kata)
+    _korpus_worker.pasang_embedding_mmap(path_mmap, penyimpanan)
+    _opsi_worker = opsi
+
+
+def _analisis_kelompok(kelompok):
+    """Record hasil untuk satu kelompok daerah (dihitung sekali jalan) + statistik (pid, detik)"""
+    mulai = time.perf_counter()
+    kandidat_isu = _korpus_worker.hitung_kandidat(kelompok, _opsi_worker["threshold"], _opsi_worker["block_size"])
+    records = list(_korpus_worker.iter_hasil(kelompok, kandidat_isu, _opsi_worker["tema_filter_id"]))
+    return records, os.getpid(), time.perf_counter() - mulai
+
+
+def kelompokkan_daerah(daerah_terpilih, isu_per_daerah, target_isu):
+    """
+    Bagi daerah_terpilih jadi kelompok berurutan berisi ~target_isu isu (minimal 1 daerah per kelompok).
+    Satu task per daerah bikin tiap task cuma beberapa baris x N -> matmul kecil & overhead per panggilan
+    kandidat_edge mendominasi; satu kelompok ~block_size isu = satu blok baris penuh.
+    """
+    kelompok, isi = [], 0
+    for daerah in daerah_terpilih:
+        if kelompok and isi + len(isu_per_daerah.get(daerah, [])) > target_isu:
+            yield kelompok
+            kelompok, isi = [], 0
+        kelompok.append(daerah)
+        isi += len(isu_per_daerah.get(daerah, []))
+    if kelompok:
+        yield kelompok
+
+
+def iter_hasil_paralel(korpus, data, kamus_raw, daerah_terpilih, n_jobs, tema_filter_id=None,
+                       threshold=None, block_size=None, batas_kata=False):
+    """
+    Versi paralel korpus.iter_hasil: daerah_terpilih dibagi jadi kelompok berurutan ~block_size isu,
+    tiap kelompok dianalisis di salah satu dari n_jobs proses worker, embedding dibagi lewat file memmap
+    (korpus.path_mmap). Record di-yield urut sesuai daerah_terpilih.
+    """
+    if korpus.path_mmap is None:
+        raise ValueError("Embedding korpus harus dipasang dengan pakai_mmap=True untuk mode paralel.")
+
+    block_size = block_size or BLOCK_SIZE
+    # Kelompok gak lebih besar dari bagian rata tiap worker, biar korpus kecil tetap kebagi ke semua proses
+    total_isu = sum(len(korpus.isu_per_daerah.get(daerah, [])) for daerah in daerah_terpilih)
+    target_isu = max(1, min(block_size, -(-total_isu // n_jobs)))
+    daftar_kelompok = list(kelompokkan_daerah(daerah_terpilih, korpus.isu_per_daerah, target_isu))
+    logging.info(f"   - {len(daerah_terpilih)} daerah dibagi jadi {len(daftar_kelompok)} kelompok (~{target_isu} isu)")
+
+    opsi = {"threshold": threshold, "block_size": block_size, "tema_filter_id": tema_filter_id}
+    # spawn: perilaku sama di Windows & Linux, worker gak mewarisi state parent
+    konteks = multiprocessing.get_context("spawn")
+    with konteks.Pool(
+        n_jobs, initializer=_init_worker,
+        initargs=(data, kamus_raw, batas_kata, korpus.path_mmap, korpus.penyimpanan, opsi)
+    ) as pool:
+        # imap menjaga urutan input & kelompok berurutan, jadi hasil gabungan deterministik walau selesainya acak
+        hasil_iter = pool.imap(_analisis_kelompok, daftar_kelompok)
+        selesai = 0
+        for kelompok, (records, pid, durasi) in zip(daftar_kelompok, hasil_iter):
+            selesai += len(kelompok)
+            logging.info(
+                f"[{selesai}/{len(daerah_terpilih)}] 📍 {kelompok[0]}"
+                + (f" .. {kelompok[-1]} ({len(kelompok)} daerah)" if len(kelompok) > 1 else "")
+                + f": {len(records)} record (worker {pid}, {durasi:.2f} dtk)"
+            )
+            yield from records
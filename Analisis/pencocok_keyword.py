@@ -0,0 +1,104 @@
+from collections import deque
+
+
+class PencocokKeyword:
+    """
+    Automaton Aho-Corasick dari semua keyword kamus tema.
+    Sekali jalan per teks langsung ketemu semua keyword (dan temanya) yg muncul,
+    jadi biaya pencocokan gak naik linear tiap kali keyword di kamus ditambah.
+    """
+
+    def __init__(self, keywords_per_tema, batas_kata=False):
+        """
+        keywords_per_tema: list berisi list keyword, indeks list = indeks tema.
+        batas_kata=True: keyword cuma dihitung kalau berdiri sebagai kata utuh
+        (default False = substring biasa, sama kayak `kw in text`).
+        """
+        self.batas_kata = batas_kata
+        self.keywords = []
+        self.tema_keyword = []
+
+        id_keyword = {}
+        for tema_idx, keywords in enumerate(keywords_per_tema):
+            for kw in keywords:
+                if not isinstance(kw, str) or not kw:
+                    continue
+                kw = kw.lower()
+                if kw not in id_keyword:
+                    id_keyword[kw] = len(self.keywords)
+                    self.keywords.append(kw)
+                    self.tema_keyword.append(set())
+                self.tema_keyword[id_keyword[kw]].add(tema_idx)
+
+        # Trie
+        self._goto = [{}]
+        self._output = [[]]
+        for kw_id, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._output.append([])
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._output[state].append(kw_id)
+
+        # Failure link (BFS), output state digabung dengan output failure-nya
+        self._fail = [0] * len(self._goto)
+        antrian = deque(self._goto[0].values())
+        while antrian:
+            state = antrian.popleft()
+            for ch, berikut in self._goto[state].items():
+                antrian.append(berikut)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[berikut] = self._goto[f].get(ch, 0)
+                self._output[berikut] = self._output[berikut] + self._output[self._fail[berikut]]
+
+        # Tema per state (dipakai kalau tanpa batas kata, biar gak perlu lihat keyword satu-satu)
+        self._tema_state = [
+            frozenset().union(*(self.tema_keyword[k] for k in out)) if out else frozenset()
+            for out in self._output
+        ]
+
+    def _cocok_batas(self, text, akhir, kw_id):
+        """Cek karakter sebelum & sesudah keyword bukan huruf/angka"""
+        awal = akhir - len(self.keywords[kw_id]) + 1
+        if awal > 0 and text[awal - 1].isalnum():
+            return False
+        if akhir + 1 < len(text) and text[akhir + 1].isalnum():
+            return False
+        return True
+
+    def cari(self, text):
+        """Yield (posisi_akhir, id_keyword) untuk tiap kemunculan keyword di text"""
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for kw_id in output[state]:
+                if not self.batas_kata or self._cocok_batas(text, pos, kw_id):
+                    yield pos, kw_id
+
+    def tema_cocok(self, text):
+        """Set indeks tema yg keyword-nya muncul di text"""
+        if self.batas_kata:
+            tema = set()
+            for _, kw_id in self.cari(text):
+                tema |= self.tema_keyword[kw_id]
+            return tema
+
+        goto, fail, tema_state = self._goto, self._fail, self._tema_state
+        tema = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if tema_state[state]:
+                tema |= tema_state[state]
+        return tema
@@ -0,0 +1,91 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Flush ke disk tiap sekian record / detik, mana yg duluan
+FLUSH_SETIAP = 200
+FLUSH_DETIK = 5.0
+
+
+class PenulisJSONL:
+    """
+    Tulis record hasil satu per baris (JSONL) begitu record dihasilkan,
+    jadi gak perlu menampung semua hasil di memori & yg sudah ditulis gak hilang kalau proses crash.
+    """
+
+    def __init__(self, path, flush_setiap=FLUSH_SETIAP, flush_detik=FLUSH_DETIK):
+        self.path = path
+        self.flush_setiap = flush_setiap
+        self.flush_detik = flush_detik
+        self.jumlah = 0
+        self._f = None
+        self._belum_flush = 0
+        self._flush_terakhir = time.monotonic()
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def tulis(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write("\n")
+        self.jumlah += 1
+        self._belum_flush += 1
+        if self._belum_flush >= self.flush_setiap or time.monotonic() - self._flush_terakhir >= self.flush_detik:
+            self.flush()
+
+    def flush(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._belum_flush = 0
+        self._flush_terakhir = time.monotonic()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        self._f.close()
+        return False
+
+
+def iter_jsonl(path):
+    """Yield record dari file JSONL (baris kosong dilewati)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for baris in f:
+            if baris.strip():
+                yield json.loads(baris)
+
+
+def kompak_jsonl(path_jsonl, path_json):
+    """
+    Ubah JSONL jadi array JSON format hasil.json (sama persis dgn json.dump(..., indent=2)),
+    ditulis record per record lewat file sementara. Hasil: jumlah record.
+    """
+    tmp_path = path_json + ".tmp"
+    jumlah = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in iter_jsonl(path_jsonl):
+            isi = json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            f.write(("[\n  " if jumlah == 0 else ",\n  ") + isi)
+            jumlah += 1
+        f.write("\n]" if jumlah else "[]")
+    os.replace(tmp_path, path_json)
+    return jumlah
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Ringkas hasil.jsonl jadi hasil.json (array)")
+    parser.add_argument("jsonl", nargs="?", default="./Output/hasil.jsonl", help="File JSONL sumber")
+    parser.add_argument("json", nargs="?", default="./Output/hasil.json", help="File JSON tujuan")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.jsonl):
+        logging.error(f"File {args.jsonl} tidak ditemukan.")
+        sys.exit()
+
+    jumlah = kompak_jsonl(args.jsonl, args.json)
+    logging.info(f"📂 {jumlah} record dari {args.jsonl} tersimpan di {args.json}")